@@ -0,0 +1,103 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from discovery import list_dir
+from supporting import get_output_writer, render_page_refs
+from template import load_template, template_for
+from writer import write_if_changed
+
+DEFAULT_OPEN_FILES = 32
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def _write(path, html, created_dirs):
+    directory = os.path.dirname(path)
+    if directory not in created_dirs:
+        os.makedirs(directory, exist_ok=True)
+        created_dirs.add(directory)
+    return write_if_changed(path, html.encode())
+
+
+class AsyncPageBuilder():
+    # directory listings, reads and writes run on an I/O thread pool so
+    # their latency overlaps; parsing goes to render_executor, which may be
+    # a process pool
+    def __init__(self, template_path, basepath, max_open_files=DEFAULT_OPEN_FILES, render_executor=None, page_refs=None):
+        self.template_path = template_path
+        self.basepath = basepath
+        # keyed by output path relative to the dest_dir given to build_dir
+        self.page_refs = page_refs
+        self.open_files = asyncio.Semaphore(max_open_files)
+        # reads outrun parsing, so also cap how many pages sit in memory
+        self.pending_pages = asyncio.Semaphore(max_open_files * 4)
+        self.io = ThreadPoolExecutor(max_workers=max_open_files)
+        self.render_executor = render_executor or ThreadPoolExecutor(max_workers=1)
+        self.owns_render_executor = render_executor is None
+        self.created_dirs = set()
+        self.stats = {"pages": 0, "written": 0, "unchanged": 0}
+        self.errors = []
+
+    async def run_io(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.io, func, *args)
+
+    async def build_dir(self, content_dir, dest_dir, section=""):
+        async with self.open_files:
+            files, dirs = await self.run_io(list_dir, content_dir)
+        template = await self.run_io(
+            load_template, template_for(self.template_path, section), self.basepath)
+        async with asyncio.TaskGroup() as group:
+            for name in files:
+                output = name.replace(".md", ".html")
+                group.create_task(self.build_page(
+                    f"{content_dir}/{name}", f"{dest_dir}/{output}", template, f"{section}{output}"))
+            for name in dirs:
+                group.create_task(self.build_dir(
+                    f"{content_dir}/{name}", f"{dest_dir}/{name}", f"{section}{name}/"))
+
+    async def build_page(self, from_path, dest_path, template, output):
+        try:
+            async with self.pending_pages:
+                async with self.open_files:
+                    markdown = await self.run_io(_read, from_path)
+                html, refs = await asyncio.get_running_loop().run_in_executor(
+                    self.render_executor, render_page_refs, markdown, template, self.basepath)
+                async with self.open_files:
+                    written = await self.run_io(_write, dest_path, html, self.created_dirs)
+        except Exception as e:
+            self.errors.append((from_path, f"{type(e).__name__}: {e}"))
+            print(f"error generating {from_path}: {self.errors[-1][1]}")
+            return
+        self.stats["pages"] += 1
+        self.stats["unchanged" if written is None else "written"] += 1
+        if self.page_refs is not None:
+            self.page_refs[output] = refs
+        if get_output_writer() is not None:
+            get_output_writer().count(written)
+
+    def close(self):
+        self.io.shutdown()
+        if self.owns_render_executor:
+            self.render_executor.shutdown()
+
+
+async def build_pages_async(dir_path_content, template_path, dest_dir_path, basepath, max_open_files=DEFAULT_OPEN_FILES, render_executor=None, page_refs=None):
+    builder = AsyncPageBuilder(template_path, basepath, max_open_files, render_executor, page_refs)
+    try:
+        await builder.build_dir(dir_path_content, dest_dir_path)
+    finally:
+        builder.close()
+    print(f"generated {builder.stats["pages"]} pages ({builder.stats["written"]} "
+          f"written, {builder.stats["unchanged"]} unchanged)")
+    if builder.errors:
+        raise Exception(f"failed to generate {len(builder.errors)} pages")
+    return builder.stats
+
+
+def generate_pages_async(dir_path_content, template_path, dest_dir_path, basepath, max_open_files=DEFAULT_OPEN_FILES, render_executor=None, page_refs=None):
+    return asyncio.run(build_pages_async(
+        dir_path_content, template_path, dest_dir_path, basepath,
+        max_open_files, render_executor, page_refs))
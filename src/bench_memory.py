@@ -0,0 +1,60 @@
+import argparse
+import resource
+import sys
+import time
+from htmlnode import LeafNode, ParentNode
+from corpus import generate_markdown
+from supporting import markdown_to_html_node
+from textnode import TextNode, TextType
+
+
+def instance_size(node):
+    size = sys.getsizeof(node)
+    if hasattr(node, "__dict__"):
+        size += sys.getsizeof(node.__dict__)
+    return size
+
+
+def peak_rss_kib():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in KiB everywhere else
+    if sys.platform == "darwin":
+        return peak // 1024
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="peak memory while rendering a generated corpus")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--paragraphs", type=int, default=40)
+    args = parser.parse_args()
+
+    print("bytes per instance:")
+    print(f"  TextNode   {instance_size(TextNode("x", TextType.TEXT))}")
+    print(f"  LeafNode   {instance_size(LeafNode("b", "x"))}")
+    print(f"  ParentNode {instance_size(ParentNode("p", []))}")
+
+    baseline = peak_rss_kib()
+    start = time.perf_counter()
+    trees = []
+    html_bytes = 0
+    for index in range(args.pages):
+        # keep every tree alive, the way a batch or parallel build holds
+        # many pages at once, so node size dominates the peak
+        tree = markdown_to_html_node(
+            generate_markdown(index, paragraphs=args.paragraphs))
+        html_bytes += len(tree.to_html())
+        trees.append(tree)
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_kib()
+
+    print(f"pages rendered:   {len(trees)}")
+    print(f"html produced:    {html_bytes / 1e6:.1f} MB")
+    print(f"elapsed:          {elapsed:.2f} s")
+    print(f"peak RSS:         {peak / 1024:.1f} MiB")
+    print(f"peak RSS growth:  {(peak - baseline) / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from blocks import markdown_to_blocks, block_to_block_type, remove_newlines_from_block
+from corpus import generate_corpus
+from supporting import markdown_to_html_node, text_to_textnodes, extract_title
+from template import load_template
+
+STAGES = [
+    "markdown_to_blocks",
+    "block_to_block_type",
+    "text_to_textnodes",
+    "markdown_to_html_node",
+    "to_html",
+    "template_fill",
+    "file_write",
+]
+
+
+def time_pages(paths, template, out_dir):
+    totals = dict.fromkeys(STAGES, 0.0)
+    clock = time.perf_counter
+    for i, path in enumerate(paths):
+        with open(path) as f:
+            markdown = f.read()
+
+        start = clock()
+        blocks = markdown_to_blocks(markdown)
+        totals["markdown_to_blocks"] += clock() - start
+
+        start = clock()
+        for block in blocks:
+            block_to_block_type(block)
+        totals["block_to_block_type"] += clock() - start
+
+        start = clock()
+        for block in blocks:
+            text_to_textnodes(remove_newlines_from_block(block))
+        totals["text_to_textnodes"] += clock() - start
+
+        start = clock()
+        node = markdown_to_html_node(markdown)
+        totals["markdown_to_html_node"] += clock() - start
+
+        start = clock()
+        html = node.to_html()
+        totals["to_html"] += clock() - start
+
+        start = clock()
+        page = template.render({"Title": extract_title(markdown), "Content": html})
+        totals["template_fill"] += clock() - start
+
+        start = clock()
+        with open(os.path.join(out_dir, f"{i}.html"), "w") as f:
+            f.write(page)
+        totals["file_write"] += clock() - start
+    return totals
+
+
+def run_benchmark(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        content = args.content
+        if content is None:
+            content = os.path.join(tmp, "content")
+            paths = generate_corpus(
+                content, args.pages, depth=args.depth, seed=args.seed,
+                paragraphs=args.paragraphs, list_density=args.lists,
+                quote_density=args.quotes, code_density=args.code,
+                links_per_paragraph=args.links, images=args.images)
+        else:
+            paths = sorted(
+                os.path.join(d, f) for d, _, files in os.walk(content)
+                for f in files if f.endswith(".md"))
+        template = load_template(args.template, "/")
+        out_dir = os.path.join(tmp, "out")
+        os.makedirs(out_dir)
+        runs = [time_pages(paths, template, out_dir) for _ in range(args.repeat)]
+        source_bytes = sum(os.path.getsize(path) for path in paths)
+
+    stages = {}
+    for stage in STAGES:
+        samples = [run[stage] for run in runs]
+        stages[stage] = {
+            "min": min(samples),
+            "median": statistics.median(samples),
+            "per_page_us": min(samples) / len(paths) * 1e6,
+        }
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "pages": len(paths),
+            "source_bytes": source_bytes,
+            "depth": args.depth,
+            "paragraphs": args.paragraphs,
+            "lists": args.lists,
+            "quotes": args.quotes,
+            "code": args.code,
+            "links": args.links,
+            "images": args.images,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "content": args.content,
+        },
+        "stages": stages,
+    }
+
+
+def compare(baseline, current, threshold):
+    regressions = []
+    print(f"{"stage":<24}{"baseline":>12}{"current":>12}{"change":>10}")
+    for stage in STAGES:
+        old = baseline["stages"].get(stage)
+        new = current["stages"][stage]
+        if old is None:
+            continue
+        change = (new["min"] - old["min"]) / old["min"] if old["min"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(stage)
+        print(f"{stage:<24}{old["min"]:>11.3f}s{new["min"]:>11.3f}s{change:>+10.1%}{flag}")
+    return regressions
+
+
+def print_report(result):
+    params = result["params"]
+    print(f"{params["pages"]} pages, {params["source_bytes"] / 1e6:.1f} MB of markdown, "
+          f"best of {params["repeat"]}")
+    for stage in STAGES:
+        timing = result["stages"][stage]
+        print(f"  {stage:<24}{timing["min"]:>9.3f}s{timing["per_page_us"]:>10.1f} us/page")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="time each build stage on a synthetic corpus")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--paragraphs", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=2,
+                        help="directory nesting depth of generated pages")
+    parser.add_argument("--lists", type=float, default=0.2,
+                        help="chance of a list after each paragraph")
+    parser.add_argument("--quotes", type=float, default=0.1)
+    parser.add_argument("--code", type=float, default=0.1)
+    parser.add_argument("--links", type=int, default=1,
+                        help="links per paragraph")
+    parser.add_argument("--images", type=int, default=1,
+                        help="images per page")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--content", default=None,
+                        help="benchmark an existing content tree instead")
+    parser.add_argument("--template", default="template.html")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    print_report(result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, result, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
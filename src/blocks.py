@@ -1,7 +1,7 @@
 
 
 from enum import Enum
-import re
+from grammar import HEADING_PATTERN
 from htmlnode import ParentNode
 
 
@@ -14,38 +14,77 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 
-def block_to_block_type(md_block):
-    splitted = md_block.split("\n")
-    matches = re.findall(r"#{1,6} \w.*", splitted[0])
-    if len(matches) == 1:
+def classify_lines(lines):
+    if HEADING_PATTERN.search(lines[0]):
         return BlockType.HEADING
-    if len(splitted) > 1 and md_block[:3] == "```" and md_block[-3:] == "```":
+    if len(lines) > 1 and lines[0][:3] == "```" and lines[-1][-3:] == "```":
         return BlockType.CODE
     quote = True
     unordered = True
     ordered = True
     i = 1
-    for line in splitted:
-        if line[0] != ">":
+    for line in lines:
+        if quote and line[0] != ">":
             quote = False
-        if line[:2] != "- ":
+        if unordered and line[:2] != "- ":
             unordered = False
-        if line[:3] != f"{i}. ":
+        if ordered and line[:3] != f"{i}. ":
             ordered = False
+        if not (quote or unordered or ordered):
+            return BlockType.PARAGRAPH
         i += 1
     if quote:
         return BlockType.QUOTE
     if unordered:
         return BlockType.UNORDERED_LIST
-    if ordered:
-        return BlockType.ORDERED_LIST
-    return BlockType.PARAGRAPH
+    return BlockType.ORDERED_LIST
+
+
+def block_to_block_type(md_block):
+    return classify_lines(md_block.split("\n"))
+
+
+def _trim_block(lines):
+    # the line-level equivalent of str.strip() on the joined block
+    start = 0
+    end = len(lines)
+    while start < end and lines[start].isspace():
+        start += 1
+    while end > start and lines[end - 1].isspace():
+        end -= 1
+    if start == end:
+        return None
+    lines = lines[start:end]
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    return lines
+
+
+def iter_blocks(lines):
+    # a block is a run of non-empty lines, which is exactly what splitting
+    # the document on "\n\n" and stripping each piece produces
+    current = []
+    for line in lines:
+        if line:
+            current.append(line)
+            continue
+        if current:
+            block = _trim_block(current)
+            if block is not None:
+                yield classify_lines(block), block
+            current = []
+    if current:
+        block = _trim_block(current)
+        if block is not None:
+            yield classify_lines(block), block
+
+
+def scan_blocks(markdown):
+    return iter_blocks(markdown.split("\n"))
 
 
 def markdown_to_blocks(markdown):
-    splitted = markdown.split("\n\n")
-    stripped = [x.strip() for x in splitted if x.strip() != ""]
-    return stripped
+    return ["\n".join(lines) for _, lines in scan_blocks(markdown)]
 
 
 def remove_newlines_from_block(block):
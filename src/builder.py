@@ -0,0 +1,121 @@
+import os
+import time
+from discovery import scan_files
+from linkgraph import LinkIndex
+from manifest import invalidate_manifest, list_files, page_output_path, prune_pages
+from supporting import render_page_refs
+from sync import DEFAULT_WORKERS, load_sync_state, save_sync_state, sync_tree
+from template import load_template, template_for
+from writer import InlineWriter
+
+
+class BuildResult():
+    def __init__(self):
+        # every path is relative to the output root, e.g. "blog/tom/index.html"
+        self.pages = []
+        self.assets = []
+        self.outputs = {}
+        self.errors = []
+        self.broken_links = {}
+        self.written = 0
+        self.unchanged = 0
+        self.asset_stats = {}
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return (f"BuildResult({len(self.pages)} pages, {len(self.assets)} assets, "
+                f"{len(self.errors)} errors, {self.seconds:.3f}s)")
+
+
+class Site():
+    # the whole build behind one object: nothing is printed, nothing depends
+    # on the working directory, and failures come back in the result
+    def __init__(self, content_path, template_path, static_path=None, output_path=None, basepath="/"):
+        self.content_path = content_path
+        self.template_path = template_path
+        self.static_path = static_path
+        self.output_path = output_path
+        self.basepath = basepath
+
+    def sources(self):
+        return list_files(self.content_path)
+
+    def render_markdown(self, markdown, section=""):
+        return self.render_markdown_refs(markdown, section)[0]
+
+    def template(self, section=""):
+        return load_template(template_for(self.template_path, section), self.basepath)
+
+    def render_markdown_refs(self, markdown, section=""):
+        # the page as bytes and its (links, images) targets
+        html, refs = render_page_refs(markdown, self.template(section), self.basepath)
+        return html.encode(), refs
+
+    def render_source(self, rel_path, markdown=None):
+        if markdown is None:
+            with open(os.path.join(self.content_path, rel_path)) as f:
+                markdown = f.read()
+        return self.render_markdown(markdown, os.path.dirname(rel_path))
+
+    def render_pages(self, result, emit, overrides=None, check_links=False):
+        # overrides maps content-relative paths to Markdown that replaces or
+        # adds to what is on disk, e.g. an unsaved edit being previewed
+        overrides = overrides or {}
+        index = LinkIndex()
+        for rel_path in sorted(set(self.sources()) | set(overrides)):
+            output = page_output_path(rel_path)
+            try:
+                markdown = overrides.get(rel_path)
+                if markdown is None:
+                    with open(os.path.join(self.content_path, rel_path)) as f:
+                        markdown = f.read()
+                data, refs = self.render_markdown_refs(markdown, os.path.dirname(rel_path))
+                emit(output, data)
+            except Exception as e:
+                result.errors.append((rel_path, f"{type(e).__name__}: {e}"))
+                continue
+            result.pages.append(output)
+            if check_links:
+                index.set_page(output, *refs)
+        if check_links:
+            result.broken_links = index.check(set(result.pages) | set(result.assets))
+
+    def build_in_memory(self, overrides=None, check_links=False, include_assets=False):
+        # static assets are only listed by default; their bytes can run to
+        # gigabytes, so they are read into outputs only when asked for
+        start = time.perf_counter()
+        result = BuildResult()
+        if self.static_path is not None and os.path.isdir(self.static_path):
+            for rel_path in sorted(scan_files(self.static_path)):
+                if include_assets:
+                    with open(os.path.join(self.static_path, rel_path), "rb") as f:
+                        result.outputs[rel_path] = f.read()
+                result.assets.append(rel_path)
+        self.render_pages(result, result.outputs.__setitem__, overrides, check_links)
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def build(self, check_links=False, use_hash=False, link="copy", workers=DEFAULT_WORKERS):
+        if self.output_path is None:
+            raise ValueError("an output path is needed to build to disk")
+        start = time.perf_counter()
+        result = BuildResult()
+        if self.static_path is not None:
+            previous = load_sync_state(self.output_path)
+            state, result.asset_stats = sync_tree(
+                self.static_path, self.output_path, previous, use_hash, link, workers)
+            save_sync_state(self.output_path, state)
+            result.assets = sorted(state)
+        invalidate_manifest(self.output_path)
+        writer = InlineWriter()
+
+        def emit(output, data):
+            writer.submit(os.path.join(self.output_path, output), data)
+        self.render_pages(result, emit, check_links=check_links)
+        # a page that failed to render keeps its previous output
+        prune_pages(self.output_path, result.pages + [
+            page_output_path(rel_path) for rel_path, _ in result.errors])
+        result.written = writer.written
+        result.unchanged = writer.unchanged
+        result.seconds = time.perf_counter() - start
+        return result
@@ -0,0 +1,88 @@
+import hashlib
+import os
+import tempfile
+
+DEFAULT_CACHE_DIR = ".cache/render"
+DEFAULT_MAX_BYTES = 256 << 20
+
+
+class RenderCache():
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, version=""):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = None
+
+    def key(self, source):
+        digest = hashlib.sha256(f"{self.version}\0".encode())
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path) as f:
+                value = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        # the mtime doubles as the last-used time for LRU eviction
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "w") as f:
+            f.write(value)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+        if self._total_bytes is None:
+            self._total_bytes = self.size()
+        else:
+            self._total_bytes += size
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def entries(self):
+        found = []
+        if not os.path.isdir(self.root):
+            return found
+        for bucket in os.scandir(self.root):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                found.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return found
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        # drop least recently used entries until a tenth of the budget is free
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._total_bytes = total
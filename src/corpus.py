@@ -0,0 +1,76 @@
+import os
+import random
+
+WORDS = (
+    "elves hobbits rings mountains rivers forest shadow light song road "
+    "tower king steward wizard ranger horse sword harp hall river gate"
+).split()
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def inline_text(rng, links=1, images=0):
+    parts = [sentence(rng, 6), f"**{sentence(rng, 2)}**", sentence(rng, 4),
+             f"_{sentence(rng, 2)}_", f"`{rng.choice(WORDS)}()`"]
+    for i in range(links):
+        parts.append(f"[{sentence(rng, 2)}](/blog/{rng.choice(WORDS)}-{i})")
+    for i in range(images):
+        parts.append(f"![{rng.choice(WORDS)}](/images/{rng.choice(WORDS)}-{i}.png)")
+    parts.append(sentence(rng, 5) + ".")
+    rng.shuffle(parts)
+    return " ".join(parts)
+
+
+def generate_markdown(index, rng=None, paragraphs=10, list_density=0.2,
+                      quote_density=0.1, code_density=0.1, links_per_paragraph=1,
+                      images=1):
+    rng = rng or random.Random(index)
+    blocks = [f"# Generated page {index}"]
+    images_left = images
+    for i in range(paragraphs):
+        if i % 4 == 3:
+            blocks.append(f"## {sentence(rng, 3)}")
+        image_here = 1 if images_left > 0 else 0
+        images_left -= image_here
+        blocks.append(inline_text(rng, links_per_paragraph, image_here))
+        roll = rng.random()
+        if roll < list_density:
+            marker = rng.choice(["-", "ordered"])
+            items = [inline_text(rng, 0) for _ in range(rng.randint(2, 6))]
+            if marker == "-":
+                blocks.append("\n".join(f"- {item}" for item in items))
+            else:
+                blocks.append("\n".join(
+                    f"{n}. {item}" for n, item in enumerate(items, 1)))
+        elif roll < list_density + quote_density:
+            blocks.append("\n".join(
+                f"> {sentence(rng, 8)}" for _ in range(rng.randint(1, 4))))
+        elif roll < list_density + quote_density + code_density:
+            code = "\n".join(sentence(rng, 5) for _ in range(rng.randint(2, 8)))
+            blocks.append(f"```\n{code}\n```")
+    return "\n\n".join(blocks) + "\n"
+
+
+def page_rel_path(index, depth, fanout=10):
+    parts = []
+    bucket = index
+    for level in range(depth):
+        parts.append(f"section-{level}-{bucket % fanout}")
+        bucket //= fanout
+    parts.append(f"post-{index}")
+    return "/".join(parts) + "/index.md"
+
+
+def generate_corpus(root, pages, depth=1, seed=0, **density):
+    paths = []
+    for index in range(pages):
+        rng = random.Random(f"{seed}:{index}")
+        rel_path = page_rel_path(index, depth)
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(generate_markdown(index, rng, **density))
+        paths.append(path)
+    return paths
@@ -0,0 +1,120 @@
+import json
+import os
+import time
+
+# a directory modified this recently can change again without its mtime
+# moving, so it is listed again on the next refresh
+RACY_WINDOW_NS = 2 * 10**9
+
+
+def list_dir(path):
+    # a single readdir: is_dir() comes from the entry's type, so there is no
+    # stat per entry the way os.path.isfile after os.listdir needs one
+    files = []
+    dirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                dirs.append(entry.name)
+            else:
+                files.append(entry.name)
+    return sorted(files), sorted(dirs)
+
+
+def scan_files(root):
+    # every file below root with its stat, keyed by "/"-separated path;
+    # directories and files that vanish mid-walk (or a missing root) are
+    # skipped, since watchers walk trees that are being edited
+    found = {}
+    pending = [""]
+    while pending:
+        rel_dir = pending.pop()
+        try:
+            entries = os.scandir(os.path.join(root, rel_dir))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                rel_path = f"{rel_dir}{entry.name}"
+                if entry.is_dir():
+                    pending.append(rel_path + "/")
+                    continue
+                try:
+                    found[rel_path] = entry.stat()
+                except FileNotFoundError:
+                    continue
+    return found
+
+
+class Inventory():
+    def __init__(self, root, dirs=None):
+        self.root = root
+        # rel_dir ("" for the root, "blog/tom/" below it) -> directory mtime
+        # plus the names of the files and directories it holds
+        self.dirs = dirs if dirs is not None else {}
+        self.listed = 0
+
+    @classmethod
+    def scan(cls, root):
+        return cls(root).refresh()
+
+    def refresh(self):
+        # only directories whose mtime moved are listed again; files being
+        # added, removed or renamed is exactly what moves a directory's mtime
+        self.listed = 0
+        seen = set()
+        pending = [""]
+        while pending:
+            rel_dir = pending.pop()
+            path = os.path.join(self.root, rel_dir)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            known = self.dirs.get(rel_dir)
+            if known is None or known["mtime"] != mtime:
+                files, dirs = list_dir(path)
+                self.listed += 1
+                if time.time_ns() - mtime < RACY_WINDOW_NS:
+                    mtime = None
+                known = {"mtime": mtime, "files": files, "dirs": dirs}
+                self.dirs[rel_dir] = known
+            seen.add(rel_dir)
+            pending.extend(f"{rel_dir}{name}/" for name in known["dirs"])
+        for rel_dir in list(self.dirs):
+            if rel_dir not in seen:
+                del self.dirs[rel_dir]
+        return self
+
+    def paths(self, suffix=None):
+        found = []
+        for rel_dir, listing in self.dirs.items():
+            for name in listing["files"]:
+                if suffix is None or name.endswith(suffix):
+                    found.append(f"{rel_dir}{name}")
+        return sorted(found)
+
+    def to_dict(self):
+        return {"root": self.root, "dirs": self.dirs}
+
+    @classmethod
+    def from_dict(cls, data, root):
+        # an inventory saved for some other tree is useless here
+        if data.get("root") != root:
+            return cls(root)
+        return cls(root, data["dirs"])
+
+
+def load_inventory(path, root):
+    try:
+        with open(path) as f:
+            return Inventory.from_dict(json.load(f), root)
+    except (OSError, ValueError, KeyError):
+        return Inventory(root)
+
+
+def save_inventory(path, inventory):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(inventory.to_dict(), f, sort_keys=True)
+    os.replace(path + ".tmp", path)
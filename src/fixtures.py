@@ -0,0 +1,29 @@
+import os
+import tempfile
+import unittest
+
+
+def write(path, text="", bump=0):
+    # bump pushes the mtime forward (in ns) so a rewrite within the same
+    # timestamp tick still looks changed
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+    if bump:
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump))
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+class TempDirTestCase(unittest.TestCase):
+    # every test gets a fresh self.root, removed again afterwards
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
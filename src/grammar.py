@@ -0,0 +1,10 @@
+import re
+
+# compiled once at import so hot paths never go through re's pattern cache
+
+# images first: a link never starts right after "!", so the two patterns
+# cannot match the same text
+IMAGE_PATTERN = re.compile(r"!\[(.*?)\]\((.*?)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[(.*?)\]\((.*?)\)")
+
+HEADING_PATTERN = re.compile(r"#{1,6} \w.*")
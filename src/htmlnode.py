@@ -6,6 +6,8 @@ def string_dict(incoming_dict):
 
 
 class HTMLNode():
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -26,6 +28,8 @@ class HTMLNode():
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, props=props)
 
@@ -40,6 +44,8 @@ class LeafNode(HTMLNode):
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag=tag, children=children, props=props)
 
@@ -48,7 +54,45 @@ class ParentNode(HTMLNode):
             raise ValueError("No tag")
         if not self.children:
             raise ValueError("No children")
-        return_string = ""
-        for child in self.children:
-            return_string += child.to_html()
-        return f"<{self.tag}>{return_string}</{self.tag}>"
+        return "".join(iter_html(self))
+
+
+def iter_html(node):
+    # walks the tree with an explicit stack, so deep nesting never hits the
+    # recursion limit; closing tags are pushed as plain strings
+    pending = [node]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, str):
+            yield item
+        elif isinstance(item, ParentNode):
+            if not item.tag:
+                raise ValueError("No tag")
+            if not item.children:
+                raise ValueError("No children")
+            yield f"<{item.tag}>"
+            pending.append(f"</{item.tag}>")
+            pending.extend(reversed(item.children))
+        else:
+            yield item.to_html()
+
+
+def collect_links(node):
+    # link and image targets in document order, each listed once
+    links = {}
+    images = {}
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        if node.children:
+            pending.extend(reversed(node.children))
+        elif node.props:
+            if node.tag == "a" and node.props.get("href") is not None:
+                links[node.props["href"]] = None
+            elif node.tag == "img" and node.props.get("src") is not None:
+                images[node.props["src"]] = None
+    return list(links), list(images)
+
+
+def write_html(node, fp):
+    fp.writelines(iter_html(node))
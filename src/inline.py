@@ -0,0 +1,114 @@
+from textnode import TextNode, TextType
+
+DELIMITERS = {
+    "*": ("**", TextType.BOLD),
+    "_": ("_", TextType.ITALIC),
+    "`": ("`", TextType.CODE),
+}
+
+
+class _Finder():
+    # remembers the next occurrence of a needle so that repeated lookups
+    # from increasing positions scan each character only once
+    def __init__(self, text, needle):
+        self.text = text
+        self.needle = needle
+        self.position = -2
+
+    def find(self, start):
+        if self.position == -1:
+            return -1
+        if self.position < start:
+            self.position = self.text.find(self.needle, start)
+        return self.position
+
+
+def _match_bracket(text, start, closes, parens, newlines):
+    # same rules as the r"\[(.*?)\]\((.*?)\)" patterns: the first "](" and
+    # the first ")" after it, with no newline in between
+    close = closes.find(start + 1)
+    if close == -1:
+        return None
+    paren = parens.find(close + 2)
+    if paren == -1:
+        return None
+    newline = newlines.find(start)
+    if newline != -1 and newline < paren:
+        return None
+    return text[start + 1:close], text[close + 2:paren], paren + 1
+
+
+class _ImageFinder():
+    # the old pipeline split out images before looking for links, so a link
+    # never wins over an image that starts inside it; this finds the next
+    # image start with its own finders, as queries only move forward
+    def __init__(self, text):
+        self.text = text
+        self.bangs = _Finder(text, "![")
+        self.closes = _Finder(text, "](")
+        self.parens = _Finder(text, ")")
+        self.newlines = _Finder(text, "\n")
+        self.position = -2
+
+    def find(self, start):
+        if self.position == -1 or self.position >= start:
+            return self.position
+        position = self.bangs.find(start)
+        while position != -1 and _match_bracket(
+                self.text, position + 1, self.closes, self.parens, self.newlines) is None:
+            position = self.bangs.find(position + 1)
+        self.position = position
+        return position
+
+
+def tokenize_inline(text):
+    nodes = []
+    closes = _Finder(text, "](")
+    parens = _Finder(text, ")")
+    newlines = _Finder(text, "\n")
+    images = _ImageFinder(text)
+    length = len(text)
+    plain_start = 0
+    i = 0
+    while i < length:
+        char = text[i]
+        if char in DELIMITERS:
+            delimiter, text_type = DELIMITERS[char]
+            if not text.startswith(delimiter, i):
+                i += 1
+                continue
+            inner_start = i + len(delimiter)
+            end = text.find(delimiter, inner_start)
+            if end == -1:
+                raise Exception("that's invalid Markdown syntax.")
+            if plain_start < i:
+                nodes.append(TextNode(text[plain_start:i], TextType.TEXT))
+            if inner_start < end:
+                nodes.append(TextNode(text[inner_start:end], text_type))
+            i = plain_start = end + len(delimiter)
+            continue
+        if char == "!" and text.startswith("![", i):
+            match = _match_bracket(text, i + 1, closes, parens, newlines)
+            text_type = TextType.IMAGE
+        elif char == "[":
+            match = _match_bracket(text, i, closes, parens, newlines)
+            text_type = TextType.LINK
+        else:
+            i += 1
+            continue
+        if match is None:
+            i += 1
+            continue
+        label, url, end = match
+        if text_type == TextType.LINK:
+            image = images.find(i + 1)
+            if image != -1 and image < end:
+                i += 1
+                continue
+        if plain_start < i:
+            nodes.append(TextNode(text[plain_start:i], TextType.TEXT))
+        nodes.append(TextNode(label, text_type, url))
+        i = plain_start = end
+    if plain_start < length:
+        nodes.append(TextNode(text[plain_start:], TextType.TEXT))
+    return nodes
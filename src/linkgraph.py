@@ -0,0 +1,137 @@
+import posixpath
+from htmlnode import collect_links
+from supporting import markdown_to_html_node
+
+EXTERNAL_PREFIXES = ("mailto:", "tel:", "data:", "javascript:", "//", "#")
+
+
+def page_links(markdown):
+    return collect_links(markdown_to_html_node(markdown))
+
+
+def resolve(target, page_output):
+    # returns the site-relative path a link points at, or None when it
+    # leaves the site
+    if "://" in target or target.startswith(EXTERNAL_PREFIXES):
+        return None
+    path = target.split("#", 1)[0].split("?", 1)[0]
+    if path == "":
+        return None
+    if path.startswith("/"):
+        rel_path = path.lstrip("/")
+    else:
+        rel_path = posixpath.join(posixpath.dirname(page_output), path)
+    rel_path = posixpath.normpath(rel_path) if rel_path else ""
+    return "" if rel_path == "." else rel_path
+
+
+def link_keys(output):
+    # every spelling of a link that reaches this output file
+    keys = {output}
+    if output == "index.html":
+        keys.add("")
+    elif output.endswith("/index.html"):
+        keys.add(output[:-len("/index.html")])
+    elif output.endswith(".html"):
+        keys.add(output[:-len(".html")])
+    return keys
+
+
+def target_exists(rel_path, outputs):
+    if rel_path == "":
+        return "index.html" in outputs
+    return (
+        rel_path in outputs
+        or f"{rel_path}/index.html" in outputs
+        or f"{rel_path}.html" in outputs
+    )
+
+
+class LinkIndex():
+    def __init__(self, pages=None, broken=None):
+        # pages: output path -> {"links": [...], "images": [...]}
+        self.pages = pages or {}
+        self.broken = broken or {}
+        self._inbound = None
+
+    def set_page(self, output, links, images):
+        self._unlink(output)
+        self.pages[output] = {"links": links, "images": images}
+        self._link(output)
+
+    def remove_page(self, output):
+        self._unlink(output)
+        self.pages.pop(output, None)
+        self.broken.pop(output, None)
+
+    def _targets(self, output):
+        refs = self.pages.get(output, {"links": [], "images": []})
+        for target in refs["links"] + refs["images"]:
+            rel_path = resolve(target, output)
+            if rel_path is not None:
+                yield rel_path
+
+    def _link(self, output):
+        # once built, the inbound map is kept up to date page by page
+        # instead of being rebuilt from every page after each edit
+        if self._inbound is not None:
+            for rel_path in self._targets(output):
+                self._inbound.setdefault(rel_path, set()).add(output)
+
+    def _unlink(self, output):
+        if self._inbound is not None:
+            for rel_path in self._targets(output):
+                pages = self._inbound.get(rel_path)
+                if pages is not None:
+                    pages.discard(output)
+                    if not pages:
+                        del self._inbound[rel_path]
+
+    def inbound(self):
+        if self._inbound is None:
+            self._inbound = {}
+            for output in self.pages:
+                for rel_path in self._targets(output):
+                    self._inbound.setdefault(rel_path, set()).add(output)
+        return self._inbound
+
+    def linking_to(self, outputs):
+        inbound = self.inbound()
+        pages = set()
+        for output in outputs:
+            for key in link_keys(output):
+                pages.update(inbound.get(key, ()))
+        return pages
+
+    def check_page(self, output, outputs):
+        broken = []
+        refs = self.pages.get(output, {"links": [], "images": []})
+        for kind in ("links", "images"):
+            for target in refs[kind]:
+                rel_path = resolve(target, output)
+                if rel_path is not None and not target_exists(rel_path, outputs):
+                    broken.append([kind[:-1], target])
+        if broken:
+            self.broken[output] = broken
+        else:
+            self.broken.pop(output, None)
+        return broken
+
+    def check(self, outputs, pages=None):
+        for output in sorted(self.pages if pages is None else pages):
+            if output in self.pages:
+                self.check_page(output, outputs)
+        return self.broken
+
+    def to_dict(self):
+        return {"pages": self.pages, "broken": self.broken}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("pages"), data.get("broken"))
+
+
+def report_broken(broken):
+    for output in sorted(broken):
+        for kind, target in broken[output]:
+            print(f"broken {kind} in {output}: {target}")
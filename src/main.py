@@ -1,16 +1,144 @@
-from supporting import copy_to_docs, generate_pages_recursive
-import sys
+from supporting import (
+    PARSER_VERSION,
+    copy_to_docs,
+    generate_pages_recursive,
+    set_output_writer,
+    set_render_cache,
+)
+from asyncbuild import DEFAULT_OPEN_FILES, generate_pages_async
+from cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, RenderCache
+from manifest import check_links, content_outputs, incremental_build, invalidate_manifest, prune_pages
+from parallel import generate_pages_parallel, process_pool
+from profiling import BuildProfiler
+from sync import DEFAULT_WORKERS, LINK_MODES
+from writer import DEFAULT_WRITERS, InlineWriter, OutputWriter
+import argparse
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="only rebuild pages and assets that changed since the last build")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="render pages across this many worker processes (0 = one per CPU)")
+    parser.add_argument(
+        "--async", dest="async_io", action="store_true",
+        help="overlap directory scans, reads and writes with parsing "
+             "(parses in -j processes when given)")
+    parser.add_argument(
+        "--max-open-files", type=int, default=DEFAULT_OPEN_FILES, metavar="N",
+        help="files an --async build keeps open at once")
+    parser.add_argument(
+        "--link", choices=LINK_MODES, default="copy",
+        help="how static assets are placed in docs/ (falls back to copying)")
+    parser.add_argument(
+        "--hash", action="store_true",
+        help="compare static assets by content when size or mtime differ")
+    parser.add_argument(
+        "--copy-workers", type=int, default=DEFAULT_WORKERS, metavar="N",
+        help="threads used to compare and copy static assets")
+    parser.add_argument(
+        "--write-workers", type=int, default=DEFAULT_WRITERS, metavar="N",
+        help="threads writing rendered pages behind the renderer (0 = write inline)")
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="always parse Markdown instead of reusing cached article HTML")
+    parser.add_argument(
+        "--cache-dir", default=DEFAULT_CACHE_DIR,
+        help="where rendered articles are cached between builds")
+    parser.add_argument(
+        "--cache-size", type=int, default=DEFAULT_MAX_BYTES >> 20, metavar="MB",
+        help="evict least recently used articles beyond this size")
+    parser.add_argument(
+        "--check-links", action="store_true",
+        help="report links and images that point at missing pages or assets "
+             "(always on with --incremental)")
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="print per-stage and per-page timings after the build")
+    parser.add_argument(
+        "--profile-top", type=int, default=10, metavar="N",
+        help="number of slowest pages to list in the profile")
+    parser.add_argument(
+        "--trace", metavar="PATH",
+        help="write a Chrome trace-event JSON of the build (implies --profile)")
+    args = parser.parse_args(argv)
+    # incremental builds render the few changed pages in-process
+    if args.incremental and (args.jobs != 1 or args.async_io):
+        parser.error("--incremental cannot be combined with -j/--jobs or --async")
+    return args
 
 
 def main():
-    if len(sys.argv) == 2:
-        basepath = sys.argv[1]
-    elif len(sys.argv) > 2:
-        raise Exception("too many arguments")
+    args = parse_args()
+    if not (args.profile or args.trace):
+        build(args)
+        return
+    # worker processes of a --jobs build are not instrumented, and pages are
+    # written inline so their write time is charged to the page
+    args.write_workers = 0
+    profiler = BuildProfiler().install()
+    try:
+        writer = build(args)
+    finally:
+        profiler.uninstall()
+    print(profiler.summary(args.profile_top, writer))
+    if args.trace:
+        profiler.write_trace(args.trace)
+
+
+def build(args):
+    if not args.no_cache:
+        set_render_cache(RenderCache(
+            args.cache_dir, args.cache_size << 20, PARSER_VERSION))
+    if args.write_workers > 0:
+        writer = OutputWriter(args.write_workers)
+    else:
+        writer = InlineWriter()
+    set_output_writer(writer)
+    try:
+        render_site(args)
+    finally:
+        set_output_writer(None)
+        writer.close()
+    print(f"pages: {writer.written} written, {writer.unchanged} unchanged on disk")
+    return writer
+
+
+def render_site(args):
+    basepath = args.basepath
+    if args.incremental:
+        incremental_build("content", "template.html", "static", "docs",
+                          basepath, args.hash, args.link, args.copy_workers)
+        return
+    copy_to_docs("static", "docs", args.hash, args.link, args.copy_workers)
+    invalidate_manifest("docs")
+    # with --check-links, each page's link targets come back from rendering
+    page_refs = {} if args.check_links else None
+    if args.async_io:
+        render_executor = None
+        if args.jobs != 1:
+            render_executor = process_pool(args.jobs or None)
+        try:
+            generate_pages_async("content", "template.html", "docs", basepath,
+                                 args.max_open_files, render_executor, page_refs)
+        finally:
+            if render_executor is not None:
+                render_executor.shutdown()
+    elif args.jobs != 1:
+        generate_pages_parallel(
+            "content", "template.html", "docs", basepath, args.jobs or None, page_refs)
     else:
-        basepath = "/"
-    copy_to_docs()
-    generate_pages_recursive("content", "template.html", "docs", basepath)
+        generate_pages_recursive(
+            "content", "template.html", "docs", basepath, page_refs=page_refs)
+    stale = prune_pages("docs", content_outputs("content"))
+    if stale:
+        print(f"removed pages whose Markdown is gone: {", ".join(stale)}")
+    if args.check_links:
+        check_links(page_refs, "static")
 
 
 if __name__ == "__main__":
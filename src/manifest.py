@@ -0,0 +1,283 @@
+import json
+import os
+from discovery import Inventory, scan_files
+from linkgraph import LinkIndex, report_broken
+from supporting import copy_to_docs, generate_page, get_output_writer
+from sync import DEFAULT_WORKERS, hash_file, load_sync_state, remove_output
+from template import template_for
+
+MANIFEST_NAME = ".manifest.json"
+PAGE_STATE_NAME = ".page-state.json"
+MANIFEST_VERSION = 6
+
+
+def empty_manifest():
+    return {
+        "version": MANIFEST_VERSION,
+        "basepath": None,
+        "templates": {},
+        "pages": {},
+        "links": {},
+        "outputs": [],
+        "inventory": {},
+    }
+
+
+def load_manifest(dest_dir_path):
+    manifest_path = os.path.join(dest_dir_path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return empty_manifest()
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return empty_manifest()
+    if manifest.get("version") != MANIFEST_VERSION:
+        return empty_manifest()
+    return manifest
+
+
+def save_manifest(dest_dir_path, manifest):
+    os.makedirs(dest_dir_path, exist_ok=True)
+    manifest_path = os.path.join(dest_dir_path, MANIFEST_NAME)
+    tmp_path = manifest_path + ".tmp"
+    # json.dump and indent both force the pure-Python encoder; dumps
+    # without indent runs in C, which matters on sites with many pages
+    with open(tmp_path, "w") as f:
+        f.write(json.dumps(manifest, sort_keys=True))
+    os.replace(tmp_path, manifest_path)
+
+
+def invalidate_manifest(dest_dir_path):
+    # a full build rewrites pages behind the manifest's back (possibly with
+    # another basepath), so the next incremental build must start over
+    try:
+        os.remove(os.path.join(dest_dir_path, MANIFEST_NAME))
+    except FileNotFoundError:
+        pass
+
+
+def load_page_state(dest_dir_path):
+    try:
+        with open(os.path.join(dest_dir_path, PAGE_STATE_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def save_page_state(dest_dir_path, outputs):
+    os.makedirs(dest_dir_path, exist_ok=True)
+    path = os.path.join(dest_dir_path, PAGE_STATE_NAME)
+    with open(path + ".tmp", "w") as f:
+        f.write(json.dumps(sorted(outputs)))
+    os.replace(path + ".tmp", path)
+
+
+def prune_pages(dest_dir_path, outputs):
+    # outputs are the pages this build produced; pages an earlier build
+    # (full or incremental) produced that are no longer among them are
+    # deleted, unless a static asset has taken their place
+    outputs = set(outputs)
+    assets = load_sync_state(dest_dir_path)
+    stale = [
+        output for output in load_page_state(dest_dir_path)
+        if output not in outputs and output not in assets
+        and os.path.lexists(os.path.join(dest_dir_path, output))
+    ]
+    for output in stale:
+        remove_output(dest_dir_path, output)
+    save_page_state(dest_dir_path, outputs)
+    return stale
+
+
+def content_outputs(dir_path_content):
+    return {page_output_path(rel_path) for rel_path in list_files(dir_path_content)}
+
+
+def fingerprint(path, previous=None):
+    # size and mtime are cheap to get; only re-hash when one of them moved
+    stat = os.stat(path)
+    if (
+        previous is not None
+        and previous["size"] == stat.st_size
+        and previous["mtime"] == stat.st_mtime_ns
+    ):
+        return dict(previous)
+    return {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "hash": hash_file(path),
+    }
+
+
+def list_files(root):
+    return Inventory.scan(root).paths()
+
+
+def page_output_path(rel_path):
+    head, entry = os.path.split(rel_path)
+    return os.path.join(head, entry.replace(".md", ".html")).replace(os.sep, "/")
+
+
+def templates_unchanged(paths, previous, current):
+    # previous and current map template and partial paths to fingerprints;
+    # current fills up lazily so each file is looked at once per build
+    for path in paths:
+        if path not in current:
+            try:
+                current[path] = fingerprint(path, previous.get(path))
+            except FileNotFoundError:
+                return False
+        if path not in previous or previous[path]["hash"] != current[path]["hash"]:
+            return False
+    return True
+
+
+def generate_pages_incremental(dir_path_content, template_path, dest_dir_path, basepath, manifest, stats):
+    # each page records the templates and partials it was rendered with, so
+    # editing one of them only re-renders the pages that used it
+    rebuild_all = manifest["basepath"] != basepath
+    previous = manifest["pages"]
+    current = {}
+    templates = {}
+    page_templates = {}
+    index = LinkIndex.from_dict(manifest["links"])
+    changed = []
+    # the content listing is kept between builds and only directories whose
+    # mtime moved are read again
+    inventory = Inventory.from_dict(manifest["inventory"], dir_path_content).refresh()
+    for rel_path in inventory.paths():
+        source = os.path.join(dir_path_content, rel_path)
+        old = previous.get(rel_path)
+        entry = fingerprint(source, old)
+        entry["output"] = page_output_path(rel_path)
+        target = os.path.join(dest_dir_path, entry["output"])
+        section = os.path.dirname(rel_path)
+        if section not in page_templates:
+            page_templates[section] = template_for(template_path, section)
+        if (
+            rebuild_all
+            or old is None
+            or old["hash"] != entry["hash"]
+            or old["templates"][0] != page_templates[section]
+            or not templates_unchanged(old["templates"], manifest["templates"], templates)
+            or not os.path.exists(target)
+            # links come out of rendering, so a page the index lost is redone
+            or entry["output"] not in index.pages
+        ):
+            entry["templates"], refs = generate_page(
+                source, page_templates[section], target, basepath, True)
+            stats["rendered"] += 1
+        else:
+            entry["templates"] = old["templates"]
+            refs = None
+            stats["skipped"] += 1
+        for path in entry["templates"]:
+            if path not in templates:
+                templates[path] = fingerprint(path, manifest["templates"].get(path))
+        # links only depend on the Markdown, not on the template or basepath
+        if old is None or old["hash"] != entry["hash"] or entry["output"] not in index.pages:
+            index.set_page(entry["output"], *refs)
+            changed.append(entry["output"])
+        current[rel_path] = entry
+    for rel_path, old in previous.items():
+        if rel_path not in current:
+            remove_output(dest_dir_path, old["output"])
+            index.remove_page(old["output"])
+            stats["removed"] += 1
+    manifest["pages"] = current
+    manifest["templates"] = {
+        path: templates[path]
+        for entry in current.values() for path in entry["templates"]
+    }
+    manifest["basepath"] = basepath
+    manifest["links"] = index.to_dict()
+    manifest["inventory"] = inventory.to_dict()
+    return changed
+
+
+def check_links_incremental(manifest, outputs, changed, index=None):
+    # a page needs re-checking when its own links changed or when a file it
+    # points at appeared or disappeared
+    if index is None:
+        index = LinkIndex.from_dict(manifest["links"])
+    appeared_or_gone = outputs.symmetric_difference(manifest["outputs"])
+    recheck = set(changed) | index.linking_to(appeared_or_gone)
+    index.check(outputs, recheck)
+    manifest["links"] = index.to_dict()
+    manifest["outputs"] = sorted(outputs)
+    return index.broken
+
+
+def check_links(page_refs, static_path):
+    # a from-scratch check for builds that keep no manifest; page_refs maps
+    # each output to the (links, images) its render returned
+    index = LinkIndex()
+    outputs = set(scan_files(static_path))
+    for output, refs in page_refs.items():
+        index.set_page(output, *refs)
+        outputs.add(output)
+    broken = index.check(outputs)
+    report_broken(broken)
+    return broken
+
+
+def update_pages(dir_path_content, template_path, dest_dir_path, basepath, rel_paths, manifest, index, page_outputs):
+    # for the watcher: renders or removes just these content files and
+    # records them in the manifest, index and page outputs it keeps in
+    # memory; saving them is left to the watcher
+    changed = []
+    for rel_path in rel_paths:
+        source = os.path.join(dir_path_content, rel_path)
+        old = manifest["pages"].pop(rel_path, None)
+        output = page_output_path(rel_path)
+        if not os.path.isfile(source):
+            remove_output(dest_dir_path, output)
+            index.remove_page(output)
+            page_outputs.discard(output)
+            continue
+        # fingerprint before rendering: an edit landing in between must
+        # not be recorded as already built
+        entry = fingerprint(source, old)
+        entry["output"] = output
+        entry["templates"], refs = generate_page(
+            source, template_for(template_path, os.path.dirname(rel_path)),
+            os.path.join(dest_dir_path, output), basepath, True)
+        for path in entry["templates"]:
+            manifest["templates"][path] = fingerprint(path, manifest["templates"].get(path))
+        index.set_page(output, *refs)
+        changed.append(output)
+        page_outputs.add(output)
+        manifest["pages"][rel_path] = entry
+    manifest["links"] = index.to_dict()
+    outputs = {entry["output"] for entry in manifest["pages"].values()}
+    outputs.update(load_sync_state(dest_dir_path))
+    broken = check_links_incremental(manifest, outputs, changed, index)
+    report_broken({output: broken[output] for output in changed if output in broken})
+    return changed
+
+
+def incremental_build(dir_path_content, template_path, static_path, dest_dir_path, basepath, use_hash=False, link="copy", workers=DEFAULT_WORKERS):
+    manifest = load_manifest(dest_dir_path)
+    stats = {"rendered": 0, "skipped": 0, "removed": 0}
+    stats.update(copy_to_docs(static_path, dest_dir_path, use_hash, link, workers))
+    changed = generate_pages_incremental(
+        dir_path_content, template_path, dest_dir_path, basepath, manifest, stats)
+    outputs = {entry["output"] for entry in manifest["pages"].values()}
+    outputs.update(load_sync_state(dest_dir_path))
+    broken = check_links_incremental(manifest, outputs, changed)
+    stats["broken"] = sum(len(found) for found in broken.values())
+    # outputs of an earlier full build are not in the manifest
+    stats["removed"] += len(prune_pages(
+        dest_dir_path, {entry["output"] for entry in manifest["pages"].values()}))
+    # the manifest must not claim pages that never reached the disk
+    if get_output_writer() is not None:
+        get_output_writer().flush()
+    save_manifest(dest_dir_path, manifest)
+    report_broken(broken)
+    print(
+        f"incremental build: {stats["rendered"]} rendered, {stats["skipped"]} "
+        f"unchanged, {stats["removed"]} removed, {stats["copied"] + stats["linked"]} "
+        f"assets copied, {stats["deleted"]} assets deleted, "
+        f"{stats["broken"]} broken links")
+    return stats
@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from discovery import Inventory
+from supporting import get_output_writer, get_render_cache, render_page_refs, set_render_cache
+from template import compile_template, read_template, template_for
+from writer import write_if_changed
+
+_templates = {}
+_template_sources = None
+_basepath = None
+
+
+def discover_pages(dir_path_content, dest_dir_path, inventory=None):
+    inventory = inventory or Inventory.scan(dir_path_content)
+    pages = []
+    for rel_path in inventory.paths():
+        head, entry = os.path.split(rel_path)
+        dest_dir = f"{dest_dir_path}/{head}" if head else dest_dir_path
+        pages.append((f"{dir_path_content}/{rel_path}",
+                      f"{dest_dir}/{entry.replace(".md", ".html")}"))
+    pages.sort()
+    return pages
+
+
+def process_pool(jobs=None, **kwargs):
+    # builds run writer and I/O threads, and a forked child inherits their
+    # locks in whatever state they were in; forkserver children are forked
+    # from a clean single-threaded server instead
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(jobs, mp_context=context, **kwargs)
+
+
+def _init_worker(template_sources, basepath, render_cache):
+    global _template_sources, _basepath
+    # template path -> contents with partials already inlined; each one is
+    # compiled the first time a page needs it
+    _template_sources = template_sources
+    _templates.clear()
+    _basepath = basepath
+    set_render_cache(render_cache)
+
+
+def _render_job(job):
+    from_path, dest_path, template_path = job
+    try:
+        template = _templates.get(template_path)
+        if template is None:
+            template = compile_template(_template_sources[template_path], _basepath)
+            _templates[template_path] = template
+        with open(from_path) as f:
+            markdown = f.read()
+        html, refs = render_page_refs(markdown, template, _basepath)
+        return dest_path, html, refs, None
+    except Exception as e:
+        return dest_path, None, None, f"{type(e).__name__}: {e}"
+
+
+def generate_pages_parallel(dir_path_content, template_path, dest_dir_path, basepath, jobs=None, page_refs=None):
+    pages = []
+    template_sources = {}
+    for from_path, dest_path in discover_pages(dir_path_content, dest_dir_path):
+        section = os.path.relpath(os.path.dirname(from_path), dir_path_content)
+        page_template = template_for(template_path, "" if section == "." else section)
+        if page_template not in template_sources:
+            template_sources[page_template] = read_template(page_template)[0]
+        pages.append((from_path, dest_path, page_template))
+    jobs = jobs or os.cpu_count() or 1
+    # a few chunks per worker keeps IPC overhead low without starving the pool
+    chunksize = max(1, len(pages) // (jobs * 4))
+    errors = []
+    created_dirs = set()
+    writer = get_output_writer()
+    with process_pool(
+        jobs,
+        initializer=_init_worker,
+        initargs=(template_sources, basepath, get_render_cache()),
+    ) as executor:
+        results = executor.map(_render_job, pages, chunksize=chunksize)
+        # map yields in submission order, so outputs are written in the same
+        # sorted order no matter which worker finished first
+        for (from_path, _, _), (dest_path, html, refs, error) in zip(pages, results):
+            if error is not None:
+                errors.append((from_path, error))
+                print(f"error generating {from_path}: {error}")
+                continue
+            if page_refs is not None:
+                output = os.path.relpath(dest_path, dest_dir_path)
+                page_refs[output.replace(os.sep, "/")] = refs
+            if writer is not None:
+                writer.submit(dest_path, html)
+                continue
+            dest_dir = os.path.dirname(dest_path)
+            if dest_dir not in created_dirs:
+                os.makedirs(dest_dir, exist_ok=True)
+                created_dirs.add(dest_dir)
+            write_if_changed(dest_path, html.encode())
+    print(f"generated {len(pages) - len(errors)} of {len(pages)} pages using {jobs} workers")
+    if errors:
+        raise Exception(f"failed to generate {len(errors)} pages")
+    return len(pages)
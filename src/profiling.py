@@ -0,0 +1,173 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import htmlnode
+import supporting
+
+
+class BuildProfiler():
+    def __init__(self):
+        self.clock = time.perf_counter
+        self.origin = self.clock()
+        self.stages = {}
+        self.pages = []
+        self.events = []
+        self.files_copied = 0
+        self.bytes_copied = 0
+        self._active = set()
+        self._patches = []
+
+    def record(self, stage, start, end, args=None):
+        total, count = self.stages.get(stage, (0.0, 0))
+        self.stages[stage] = (total + end - start, count + 1)
+        event = {
+            "name": stage,
+            "cat": "build",
+            "ph": "X",
+            "ts": (start - self.origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def timed(self, stage, func):
+        # nested calls of the same stage (to_html inside to_html) are only
+        # timed at the outermost level
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if stage in self._active:
+                return func(*args, **kwargs)
+            self._active.add(stage)
+            start = self.clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._active.discard(stage)
+                self.record(stage, start, self.clock())
+        return wrapper
+
+    def timed_generator(self, stage, func):
+        # only the time spent producing chunks is counted, not the time the
+        # consumer spends writing them out
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            generator = func(*args, **kwargs)
+            if stage in self._active:
+                return generator
+            return self._drain(stage, generator)
+        return wrapper
+
+    def _drain(self, stage, generator):
+        first = None
+        spent = 0.0
+        while True:
+            start = self.clock()
+            if first is None:
+                first = start
+            self._active.add(stage)
+            try:
+                chunk = next(generator)
+            except StopIteration:
+                spent += self.clock() - start
+                self.record(stage, first, first + spent)
+                return
+            finally:
+                self._active.discard(stage)
+            spent += self.clock() - start
+            yield chunk
+
+    def timed_page(self, func):
+        @functools.wraps(func)
+        def wrapper(from_path, template_path, dest_path, basepath, *args):
+            start = self.clock()
+            result = func(from_path, template_path, dest_path, basepath, *args)
+            end = self.clock()
+            self.pages.append((end - start, from_path))
+            self.record("generate_page", start, end, {"page": from_path})
+            return result
+        return wrapper
+
+    def timed_copy(self, func):
+        timed = self.timed("copy_to_docs", func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stats = timed(*args, **kwargs)
+            self.files_copied += stats["copied"] + stats["linked"]
+            self.bytes_copied += stats["bytes"]
+            return stats
+        return wrapper
+
+    def patch(self, owner, name, replacement):
+        original = getattr(owner, name)
+        self._patches.append((owner, name, original))
+        setattr(owner, name, replacement)
+        return original
+
+    def patch_everywhere(self, original, replacement):
+        # functions imported with "from x import y" live on in other modules
+        for module in list(sys.modules.values()):
+            for name, value in list(getattr(module, "__dict__", {}).items()):
+                if value is original:
+                    self.patch(module, name, replacement)
+
+    def install(self):
+        functions = [
+            (supporting.generate_page, self.timed_page(supporting.generate_page)),
+            (supporting.markdown_to_html_node,
+             self.timed("markdown_to_html_node", supporting.markdown_to_html_node)),
+            (supporting.copy_to_docs, self.timed_copy(supporting.copy_to_docs)),
+            (htmlnode.iter_html,
+             self.timed_generator("to_html", htmlnode.iter_html)),
+        ]
+        for original, replacement in functions:
+            self.patch_everywhere(original, replacement)
+        for cls in (htmlnode.LeafNode, htmlnode.ParentNode):
+            self.patch(cls, "to_html", self.timed("to_html", cls.to_html))
+        return self
+
+    def uninstall(self):
+        while self._patches:
+            owner, name, original = self._patches.pop()
+            setattr(owner, name, original)
+
+    def summary(self, top=10, writer=None):
+        # writer is the build's output writer, which knows what actually
+        # reached the disk
+        elapsed = self.clock() - self.origin
+        lines = [f"build profile ({elapsed:.3f}s wall)"]
+        lines.append(f"  {"stage":<24}{"total":>10}{"calls":>8}{"mean":>12}")
+        for stage, (total, count) in sorted(
+                self.stages.items(), key=lambda item: -item[1][0]):
+            lines.append(
+                f"  {stage:<24}{total:>9.3f}s{count:>8}{total / count * 1e3:>10.3f}ms")
+        if self.pages:
+            lines.append(f"  slowest {min(top, len(self.pages))} pages:")
+            for duration, page in sorted(self.pages, reverse=True)[:top]:
+                lines.append(f"    {duration * 1e3:>9.3f}ms  {page}")
+        if writer is not None:
+            lines.append(
+                f"  pages written: {writer.written} ({writer.bytes_written} bytes), "
+                f"{writer.unchanged} unchanged")
+        lines.append(
+            f"  files copied:  {self.files_copied} ({self.bytes_copied} bytes)")
+        inline = supporting.inline_cache_info()
+        lines.append(
+            f"  inline memo:   {inline.hits} hits, {inline.misses} misses "
+            f"({inline.currsize}/{inline.maxsize} entries)")
+        render_cache = supporting.get_render_cache()
+        if render_cache is not None:
+            lines.append(
+                f"  render cache:  {render_cache.hits} hits, "
+                f"{render_cache.misses} misses")
+        return "\n".join(lines)
+
+    def write_trace(self, path):
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
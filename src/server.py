@@ -0,0 +1,208 @@
+import argparse
+import collections
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+from builder import Site
+from cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, RenderCache
+from supporting import PARSER_VERSION, set_render_cache
+
+LATENCY_WINDOW = 10000
+MAX_CONNECTIONS = 32
+IDLE_TIMEOUT = 30
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+class RenderService():
+    # stays resident so the compiled templates, the inline memo and the
+    # render cache are warm for every request; each request renders on its
+    # own server thread, as rendering holds the GIL and a pool behind it
+    # would only add a handoff
+    def __init__(self, site, window=LATENCY_WINDOW):
+        self.site = site
+        self.lock = threading.Lock()
+        self.latencies = collections.deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+
+    def warm(self):
+        # compiles each section's template once up front; a broken template
+        # should stop the server from starting
+        for section in sorted({os.path.dirname(rel_path) for rel_path in self.site.sources()}):
+            self.site.template(section)
+
+    def render(self, markdown, section=""):
+        start = time.perf_counter()
+        failed = True
+        try:
+            html = self.site.render_markdown(markdown, section)
+            failed = False
+            return html
+        finally:
+            with self.lock:
+                self.latencies.append(time.perf_counter() - start)
+                self.requests += 1
+                self.errors += failed
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            requests, errors = self.requests, self.errors
+        return {
+            "requests": requests,
+            "errors": errors,
+            "p50_ms": percentile(latencies, 0.5) * 1e3,
+            "p99_ms": percentile(latencies, 0.99) * 1e3,
+            "max_ms": (latencies[-1] if latencies else 0.0) * 1e3,
+        }
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    # POST /render?section=blog with Markdown as the body returns the page;
+    # GET /stats returns request counts and latency percentiles as JSON
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in separate writes; with Nagle on, a
+    # keep-alive client waits out a delayed ACK (~40ms) on every request
+    disable_nagle_algorithm = True
+    # an idle keep-alive connection gives its slot back after this long
+    timeout = IDLE_TIMEOUT
+
+    def setup(self):
+        # unix sockets have no Nagle algorithm to turn off
+        if self.request.family == socket.AF_UNIX:
+            self.disable_nagle_algorithm = False
+        super().setup()
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/render":
+            self.respond(404, b"not found\n", "text/plain")
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError(f"negative Content-Length: {length}")
+        except ValueError as e:
+            # the body cannot be found, so neither can the next request
+            self.close_connection = True
+            self.respond(400, f"{e}\n".encode(), "text/plain")
+            return
+        body = self.rfile.read(length)
+        section = parse_qs(url.query).get("section", [""])[0]
+        try:
+            html = self.server.service.render(body.decode(), section)
+        except Exception as e:
+            self.respond(400, f"{e}\n".encode(), "text/plain")
+            return
+        self.respond(200, html, "text/html; charset=utf-8")
+
+    def do_GET(self):
+        if urlsplit(self.path).path != "/stats":
+            self.respond(404, b"not found\n", "text/plain")
+            return
+        body = json.dumps(self.server.service.stats()).encode()
+        self.respond(200, body, "application/json")
+
+    def respond(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # unix socket peers have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BoundedThreadingMixIn(socketserver.ThreadingMixIn):
+    # one thread per connection, but at most `slots` of them: once they are
+    # all taken, new connections wait in the listen backlog
+    daemon_threads = True
+
+    def process_request(self, request, client_address):
+        self.slots.acquire()
+        try:
+            super().process_request(request, client_address)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.slots.release()
+
+
+class BoundedHTTPServer(BoundedThreadingMixIn, HTTPServer):
+    pass
+
+
+class BoundedUnixServer(BoundedThreadingMixIn, socketserver.UnixStreamServer):
+    pass
+
+
+def make_server(service, port=0, host="127.0.0.1", socket_path=None, max_connections=MAX_CONNECTIONS):
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = BoundedUnixServer(socket_path, RenderHandler)
+    else:
+        server = BoundedHTTPServer((host, port), RenderHandler)
+    server.slots = threading.BoundedSemaphore(max_connections)
+    server.service = service
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="keep the renderer resident and render Markdown posted to it")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--socket", metavar="PATH",
+                        help="listen on a unix socket instead of a TCP port")
+    parser.add_argument("--max-connections", type=int, default=MAX_CONNECTIONS, metavar="N",
+                        help="connections served at once; more wait to be accepted")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always parse Markdown instead of reusing cached article HTML")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="where rendered articles are cached between requests and builds")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES >> 20, metavar="MB",
+                        help="evict least recently used articles beyond this size")
+    args = parser.parse_args()
+
+    if not args.no_cache:
+        set_render_cache(RenderCache(
+            args.cache_dir, args.cache_size << 20, PARSER_VERSION))
+    site = Site("content", "template.html", "static", "docs", args.basepath)
+    service = RenderService(site)
+    service.warm()
+    server = make_server(service, args.port, socket_path=args.socket,
+                         max_connections=args.max_connections)
+    print(f"rendering on {args.socket or f"http://127.0.0.1:{args.port}/render"}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(service.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,36 @@
 from textnode import TextNode, TextType, text_node_to_html_node
-from htmlnode import ParentNode
-import re
+from htmlnode import LeafNode, ParentNode, collect_links, iter_html
+from template import load_template, template_for
+from inline import tokenize_inline
+from grammar import IMAGE_PATTERN, LINK_PATTERN
+from discovery import list_dir
+from sync import DEFAULT_WORKERS, load_sync_state, save_sync_state, sync_tree
+from writer import write_if_changed
+import filecmp
+import functools
+import itertools
+import json
 import os
-import shutil
+import time
 from blocks import (
     BlockType,
-    markdown_to_blocks,
-    remove_newlines_from_block,
+    iter_blocks,
+    scan_blocks,
     remove_spaces_from_block,
-    block_to_block_type,
     wrap_list_of_nodes_in_parent_tag,
 )
 
+# bump whenever a parser change alters the HTML produced for the same input
+PARSER_VERSION = 4
+BASEPATH_MARKER = "\0"
+INLINE_CACHE_SIZE = 8192
+# sources at least this large are rendered block by block straight to disk
+STREAM_THRESHOLD = 8 << 20
+READ_BUFFER = 1 << 20
+
+_render_cache = None
+_output_writer = None
+
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
@@ -32,103 +51,84 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 
 
 def extract_markdown_images(text):
-    matches = re.findall(r"!\[(.*?)\]\((.*?)\)", text)
-    return matches
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text):
-    matches = re.findall(r"\[(.*?)\]\((.*?)\)", text)
-    return matches
+    return LINK_PATTERN.findall(text)
 
 
-def split_nodes_image(old_nodes):
+def split_nodes_pattern(old_nodes, pattern, text_type):
     new_nodes = []
     for node in old_nodes:
-        if node.text_type == TextType.TEXT:
-            images = extract_markdown_images(node.text)
-            if images == []:
-                new_nodes.append(node)
-            else:
-                remaining_text = node.text
-                for i in images:
-                    image_alt, image_link = i
-                    splitted = remaining_text.split(
-                        f"![{image_alt}]({image_link})", 1)
-                    if splitted[0] == '':
-                        new_nodes.append(
-                            TextNode(image_alt, TextType.IMAGE, image_link))
-                    else:
-                        new_nodes.append(TextNode(splitted[0], TextType.TEXT))
-                        new_nodes.append(
-                            TextNode(image_alt, TextType.IMAGE, image_link))
-                    remaining_text = splitted[1]
-                if remaining_text != "":
-                    new_nodes.append(TextNode(remaining_text, TextType.TEXT))
-        else:
+        if node.text_type != TextType.TEXT:
+            new_nodes.append(node)
+            continue
+        text = node.text
+        position = 0
+        for match in pattern.finditer(text):
+            start, end = match.span()
+            if start > position:
+                new_nodes.append(TextNode(text[position:start], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            position = end
+        if position == 0:
             new_nodes.append(node)
+        elif position < len(text):
+            new_nodes.append(TextNode(text[position:], TextType.TEXT))
     return new_nodes
 
 
+def split_nodes_image(old_nodes):
+    return split_nodes_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
+
+
 def split_nodes_link(old_nodes):
-    new_nodes = []
-    for node in old_nodes:
-        if node.text_type == TextType.TEXT:
-            links = extract_markdown_links(node.text)
-            if links == []:
-                new_nodes.append(node)
-            else:
-                remaining_text = node.text
-                for i in links:
-                    link_alt, link = i
-                    splitted = remaining_text.split(f"[{link_alt}]({link})", 1)
-                    if splitted[0] == '':
-                        new_nodes.append(
-                            TextNode(link_alt, TextType.LINK, link))
-                    else:
-                        new_nodes.append(TextNode(splitted[0], TextType.TEXT))
-                        new_nodes.append(
-                            TextNode(link_alt, TextType.LINK, link))
-                    remaining_text = splitted[1]
-                if remaining_text != "":
-                    new_nodes.append(TextNode(remaining_text, TextType.TEXT))
-        else:
-            new_nodes.append(node)
-    return new_nodes
+    return split_nodes_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
 
 
 def text_to_textnodes(text):
-    text_node = TextNode(text, TextType.TEXT)
-    bold_split = split_nodes_delimiter(
-        [text_node], delimiter="**", text_type=TextType.BOLD)
-    italic_split = split_nodes_delimiter(
-        bold_split, delimiter="_", text_type=TextType.ITALIC)
-    code_split = split_nodes_delimiter(
-        italic_split, delimiter="`", text_type=TextType.CODE)
-    image_split = split_nodes_image(code_split)
-    link_split = split_nodes_link(image_split)
-    return link_split
-
-
-def copy_to_docs(path_extension=""):
-    docs_path = "/home/williamjv/repo/static-site-generator/docs/" + path_extension
-    static_path = "/home/williamjv/repo/static-site-generator/static/" + path_extension
-    if path_extension == "":
-        if os.path.exists(docs_path):
-            shutil.rmtree(docs_path)
-        os.mkdir(docs_path)
-        if not os.path.exists(static_path):
-            raise Exception(f"{static_path} does not exist")
-    stuff_in_static = os.listdir(static_path)
-    for entry in stuff_in_static:
-        absolute_static_path = static_path + entry
-        absolute_docs_path = docs_path + entry
-        if os.path.isfile(absolute_static_path):
-            shutil.copy(absolute_static_path, absolute_docs_path)
-            print("copied", absolute_static_path, "to", absolute_docs_path)
-        else:
-            os.mkdir(absolute_docs_path)
-            print(f"created directory {absolute_docs_path}")
-            copy_to_docs(path_extension + f"{entry}/")
+    return tokenize_inline(text)
+
+
+def _inline_html_nodes(text):
+    return tuple(text_node_to_html_node(node) for node in tokenize_inline(text))
+
+
+_memo_inline_html_nodes = functools.lru_cache(maxsize=INLINE_CACHE_SIZE)(
+    _inline_html_nodes)
+
+
+def text_to_html_nodes(text):
+    # cached nodes are shared between pages, so they must never be mutated;
+    # callers get a fresh list they are free to change
+    return list(_memo_inline_html_nodes(text))
+
+
+def set_inline_cache_size(maxsize):
+    global _memo_inline_html_nodes
+    _memo_inline_html_nodes = functools.lru_cache(maxsize=maxsize)(
+        _inline_html_nodes)
+
+
+def inline_cache_info():
+    return _memo_inline_html_nodes.cache_info()
+
+
+def copy_to_docs(static_path="static", docs_path="docs", use_hash=False, link="copy", workers=DEFAULT_WORKERS):
+    if not os.path.exists(static_path):
+        raise Exception(f"{static_path} does not exist")
+    start = time.perf_counter()
+    previous = load_sync_state(docs_path)
+    state, stats = sync_tree(
+        static_path, docs_path, previous, use_hash, link, workers)
+    save_sync_state(docs_path, state)
+    elapsed = time.perf_counter() - start
+    print(f"synced {static_path} to {docs_path}: {stats["copied"]} copied, "
+          f"{stats["linked"]} linked, {stats["unchanged"]} unchanged, "
+          f"{stats["deleted"]} deleted ({stats["bytes"] / 1e6:.1f} MB in "
+          f"{elapsed:.2f}s)")
+    return stats
 
 
 def extract_title(markdown):
@@ -139,121 +139,278 @@ def extract_title(markdown):
     raise Exception("no h1 header")
 
 
+def block_to_html_nodes(block_type, lines):
+    match block_type:
+        case BlockType.PARAGRAPH:
+            newline_stripped = " ".join([line.strip() for line in lines])
+            tests = text_to_html_nodes(newline_stripped)
+            return wrap_list_of_nodes_in_parent_tag(tests, "p")
+        case BlockType.HEADING:
+            newline_stripped = " ".join([line.strip() for line in lines])
+            hashtags = newline_stripped.split()[0]
+            number_of_hashtags = len(hashtags)
+            tests = text_to_html_nodes(newline_stripped.strip("# "))
+            return wrap_list_of_nodes_in_parent_tag(
+                tests, f"h{number_of_hashtags}")
+        case BlockType.CODE:
+            block = "\n".join(lines)
+            code_stripped = remove_spaces_from_block(block.strip("` "))
+            coded = [text_node_to_html_node(
+                TextNode(text=code_stripped, text_type=TextType.CODE))]
+            return wrap_list_of_nodes_in_parent_tag(coded, "pre")
+        case BlockType.QUOTE:
+            list_of_nodes = []
+            for i, line in enumerate(lines):
+                if i == 0:
+                    line = line[:1] + line[2:]
+                parsed_quote = line.split(">", maxsplit=1)[1]
+                list_of_nodes.extend(text_to_html_nodes(parsed_quote))
+            return wrap_list_of_nodes_in_parent_tag(list_of_nodes, "blockquote")
+        case BlockType.UNORDERED_LIST | BlockType.ORDERED_LIST:
+            list_of_nodes = []
+            for line in lines:
+                parsed_number = line.split(maxsplit=1)[1]
+                tmp_nodes = text_to_html_nodes(parsed_number)
+                list_of_nodes.extend(
+                    wrap_list_of_nodes_in_parent_tag(tmp_nodes, "li"))
+            tag = "ul" if block_type == BlockType.UNORDERED_LIST else "ol"
+            return wrap_list_of_nodes_in_parent_tag(list_of_nodes, tag)
+
+
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
     parent_node = ParentNode("div", None, None)
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        newline_stripped = remove_newlines_from_block(block)
-        match block_type:
-            case BlockType.PARAGRAPH:
-                textnodes = text_to_textnodes(newline_stripped)
-                tests = []
-                for node in textnodes:
-                    tests.append(text_node_to_html_node(node))
-                if parent_node.children is None:
-                    parent_node.children = wrap_list_of_nodes_in_parent_tag(
-                        tests, "p")
-                else:
-                    parent_node.children.extend(
-                        wrap_list_of_nodes_in_parent_tag(tests, "p"))
-            case BlockType.HEADING:
-                hashtags = newline_stripped.split()[0]
-                number_of_hashtags = len(hashtags)
-                textnodes = text_to_textnodes(newline_stripped.strip("# "))
-                tests = []
-                for node in textnodes:
-                    tests.append(text_node_to_html_node(node))
-                if parent_node.children is None:
-                    parent_node.children = wrap_list_of_nodes_in_parent_tag(
-                        tests, f"h{number_of_hashtags}")
-                else:
-                    parent_node.children.extend(
-                        wrap_list_of_nodes_in_parent_tag(tests, f"h{number_of_hashtags}"))
-            case BlockType.CODE:
-                code_stripped = remove_spaces_from_block(block.strip("` "))
-                coded = [text_node_to_html_node(
-                    TextNode(text=code_stripped, text_type=TextType.CODE))]
-                pred = wrap_list_of_nodes_in_parent_tag(coded, "pre")
-                if parent_node.children is None:
-                    parent_node.children = pred
-                else:
-                    parent_node.children.extend(pred)
-            case BlockType.QUOTE:
-                newline_splitted = block.split("\n")
-                newline_splitted[0] = newline_splitted[0][:1] + \
-                    newline_splitted[0][2:]
-                list_of_nodes = []
-                for line in newline_splitted:
-                    parsed_quote = line.split(">", maxsplit=1)[1]
-                    textnodes = text_to_textnodes(parsed_quote)
-                    for node in textnodes:
-                        html_node = text_node_to_html_node(node)
-                        list_of_nodes.append(html_node)
-                pred = wrap_list_of_nodes_in_parent_tag(
-                    list_of_nodes, "blockquote")
-                if parent_node.children is None:
-                    parent_node.children = []
-                parent_node.children.extend(pred)
-            case BlockType.UNORDERED_LIST:
-                newline_splitted = block.split("\n")
-                list_of_nodes = []
-                for line in newline_splitted:
-                    tmp_nodes = []
-                    parsed_number = line.split(maxsplit=1)[1]
-                    textnodes = text_to_textnodes(parsed_number)
-                    for node in textnodes:
-                        html_node = text_node_to_html_node(node)
-                        tmp_nodes.append(html_node)
-                    list_of_nodes.extend(
-                        wrap_list_of_nodes_in_parent_tag(tmp_nodes, "li"))
-                pred = wrap_list_of_nodes_in_parent_tag(list_of_nodes, "ul")
-                if parent_node.children is None:
-                    parent_node.children = []
-                parent_node.children.extend(pred)
-            case BlockType.ORDERED_LIST:
-                newline_splitted = block.split("\n")
-                list_of_nodes = []
-                for line in newline_splitted:
-                    tmp_nodes = []
-                    parsed_number = line.split(maxsplit=1)[1]
-                    textnodes = text_to_textnodes(parsed_number)
-                    for node in textnodes:
-                        html_node = text_node_to_html_node(node)
-                        tmp_nodes.append(html_node)
-                    list_of_nodes.extend(
-                        wrap_list_of_nodes_in_parent_tag(tmp_nodes, "li"))
-                pred = wrap_list_of_nodes_in_parent_tag(list_of_nodes, "ol")
-                if parent_node.children is None:
-                    parent_node.children = []
-                parent_node.children.extend(pred)
+    for block_type, lines in scan_blocks(markdown):
+        nodes = block_to_html_nodes(block_type, lines)
+        if parent_node.children is None:
+            parent_node.children = nodes
+        else:
+            parent_node.children.extend(nodes)
     return parent_node
 
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    entries = os.listdir(dir_path_content)
-    for entry in entries:
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath, section="", page_refs=None):
+    # template_path is always the site template; section is the content
+    # directory being rendered, which may have a template of its own.
+    # page_refs, when given, collects each page's link and image targets
+    # under its output path relative to the top dest_dir_path
+    files, dirs = list_dir(dir_path_content)
+    page_template = template_for(template_path, section)
+    for entry in files:
         entry_path = f"{dir_path_content}/{entry}"
-        if os.path.isfile(entry_path):
-            file_name = f"{dest_dir_path}/{entry.replace(".md", ".html")}"
-            generate_page(entry_path, template_path, file_name, basepath)
-        else:
-            generate_pages_recursive(entry_path, template_path, f"{
-                                     dest_dir_path}/{entry}", basepath)
+        output = entry.replace(".md", ".html")
+        _, refs = generate_page(
+            entry_path, page_template, f"{dest_dir_path}/{output}", basepath,
+            page_refs is not None)
+        if page_refs is not None:
+            page_refs[f"{section}{output}"] = refs
+    for entry in dirs:
+        generate_pages_recursive(f"{dir_path_content}/{entry}", template_path, f"{
+                                 dest_dir_path}/{entry}", basepath, f"{section}{entry}/", page_refs)
 
 
-def generate_page(from_path, template_path, dest_path, basepath):
+def generate_page(from_path, template_path, dest_path, basepath, collect_refs=False):
+    # refs come for free from the parsed tree, but a streamed page only
+    # gathers them when collect_refs asks for them
     print(f"Generating page from {from_path} to {
           dest_path} using {template_path}")
+    if os.path.getsize(from_path) >= STREAM_THRESHOLD:
+        return generate_page_streaming(
+            from_path, template_path, dest_path, basepath, collect_refs)
     with open(from_path) as f:
         from_contents = f.read()
-    with open(template_path) as f:
-        template_contents = f.read()
-    html_node = markdown_to_html_node(from_contents)
-    html_string = html_node.to_html()
-    title = extract_title(from_contents)
-    updated_template_contents = template_contents.replace(
-        "{{ Title }}", title).replace("{{ Content }}", html_string).replace("href=\"/", f"href=\"{basepath}").replace("src=\"/", f"src=\"{basepath}")
+    template = load_template(template_path, basepath)
+    # parse before opening the output so a bad page never truncates it
+    values, refs = page_values(from_contents, basepath)
+    if _output_writer is not None:
+        _output_writer.submit(dest_path, template.render(values))
+        return template.dependencies, refs
     os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    with open(dest_path, "w") as f:
-        f.write(updated_template_contents)
+    write_if_changed(dest_path, template.render(values).encode())
+    return template.dependencies, refs
+
+
+def generate_pages_batch(pages, template_path, basepath):
+    # for sections of many small generated pages (tags, archives) given as
+    # (markdown, dest_path) pairs: the template is loaded once, nothing is
+    # printed or stat-ed per page, and each output directory is created and
+    # opened once so its pages are written relative to it
+    template = load_template(template_path, basepath)
+    by_dir = {}
+    for markdown, dest_path in pages:
+        dest_dir, name = os.path.split(dest_path)
+        by_dir.setdefault(dest_dir or ".", []).append((name, markdown))
+    stats = {"pages": 0, "written": 0, "unchanged": 0}
+    errors = []
+    use_dir_fd = os.open in os.supports_dir_fd
+    for dest_dir, entries in sorted(by_dir.items()):
+        os.makedirs(dest_dir, exist_ok=True)
+        dir_fd = os.open(dest_dir, os.O_RDONLY) if use_dir_fd else None
+        try:
+            for name, markdown in entries:
+                try:
+                    data = template.render(page_values(markdown, basepath)[0]).encode()
+                except Exception as e:
+                    errors.append((os.path.join(dest_dir, name), f"{type(e).__name__}: {e}"))
+                    continue
+                if dir_fd is None:
+                    written = write_if_changed(os.path.join(dest_dir, name), data)
+                else:
+                    written = write_if_changed(name, data, dir_fd)
+                stats["pages"] += 1
+                stats["unchanged" if written is None else "written"] += 1
+                if _output_writer is not None:
+                    _output_writer.count(written)
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
+    print(f"generated {stats["pages"]} pages in {len(by_dir)} directories "
+          f"({stats["written"]} written, {stats["unchanged"]} unchanged)")
+    if errors:
+        for dest_path, error in errors:
+            print(f"error generating {dest_path}: {error}")
+        raise Exception(f"failed to generate {len(errors)} pages")
+    return stats
+
+
+def iter_file_lines(path):
+    with open(path, buffering=READ_BUFFER) as f:
+        for line in f:
+            yield line[:-1] if line.endswith("\n") else line
+
+
+def extract_title_streaming(path):
+    for line in iter_file_lines(path):
+        if line.startswith("# "):
+            return line.lstrip("# ")
+    raise Exception("no h1 header")
+
+
+def iter_article(path, basepath, refs=None):
+    # renders and serializes one block at a time, so only the block being
+    # worked on is ever held in memory; refs, a (links, images) pair of
+    # dicts used as ordered sets, gains each target once as blocks go by
+    blocks = iter_blocks(iter_file_lines(path))
+    first = next(blocks, None)
+    if first is None:
+        raise ValueError("No children")
+    yield "<div>"
+    for block_type, lines in itertools.chain([first], blocks):
+        for node in block_to_html_nodes(block_type, lines):
+            if refs is not None:
+                links, images = collect_links(node)
+                refs[0].update(dict.fromkeys(links))
+                refs[1].update(dict.fromkeys(images))
+            yield from iter_html(rebase_links(node, basepath))
+    yield "</div>"
+
+
+def generate_page_streaming(from_path, template_path, dest_path, basepath, collect_refs=False):
+    template = load_template(template_path, basepath)
+    title = extract_title_streaming(from_path)
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    tmp_path = dest_path + ".tmp"
+    refs = ({}, {}) if collect_refs else None
+    try:
+        with open(tmp_path, "w", buffering=READ_BUFFER) as f:
+            template.write(
+                f, {"Title": title, "Content": iter_article(from_path, basepath, refs)})
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    written = None
+    if not (os.path.exists(dest_path) and filecmp.cmp(tmp_path, dest_path, shallow=False)):
+        written = os.path.getsize(tmp_path)
+        os.replace(tmp_path, dest_path)
+    else:
+        os.remove(tmp_path)
+    if _output_writer is not None:
+        _output_writer.count(written)
+    if refs is not None:
+        refs = (list(refs[0]), list(refs[1]))
+    return template.dependencies, refs
+
+
+def rebase_links(html_node, basepath):
+    # only real link and image targets get the basepath, never article text;
+    # leaves are replaced rather than edited since they may be shared
+    if basepath == "/":
+        return html_node
+    pending = [html_node]
+    while pending:
+        node = pending.pop()
+        if not node.children:
+            continue
+        for i, child in enumerate(node.children):
+            if child.children:
+                pending.append(child)
+            elif child.props and any(
+                    (child.props.get(key) or "").startswith("/") for key in ("href", "src")):
+                props = dict(child.props)
+                for key in ("href", "src"):
+                    value = props.get(key)
+                    if value is not None and value.startswith("/"):
+                        props[key] = basepath + value[1:]
+                node.children[i] = LeafNode(child.tag, child.value, props)
+    return html_node
+
+
+def set_render_cache(cache):
+    global _render_cache
+    _render_cache = cache
+
+
+def get_render_cache():
+    return _render_cache
+
+
+def set_output_writer(writer):
+    # pages rendered by generate_page go to this writer instead of being
+    # written inline; very large pages are still streamed straight to disk
+    global _output_writer
+    _output_writer = writer
+
+
+def get_output_writer():
+    return _output_writer
+
+
+def cached_article(markdown):
+    # the article is cached with every root-relative link target marked by
+    # a NUL, so any basepath can be applied later with a single replace;
+    # the page's link and image targets are cached on the line before it
+    key = _render_cache.key(markdown)
+    cached = _render_cache.get(key)
+    if cached is not None:
+        title, refs, article = cached.split("\n", 2)
+        links, images = json.loads(refs)
+        return title, (links, images), article
+    html_node = markdown_to_html_node(markdown)
+    refs = collect_links(html_node)
+    html_node = rebase_links(html_node, BASEPATH_MARKER)
+    title = extract_title(markdown)
+    article = html_node.to_html()
+    if "\n" not in title:
+        _render_cache.put(key, f"{title}\n{json.dumps(refs)}\n{article}")
+    return title, refs, article
+
+
+def page_values(markdown, basepath):
+    # returns the template values and the page's (links, images) targets as
+    # written, before the basepath is applied
+    if _render_cache is not None and BASEPATH_MARKER not in markdown:
+        title, refs, article = cached_article(markdown)
+        return {"Title": title, "Content": article.replace(BASEPATH_MARKER, basepath)}, refs
+    html_node = markdown_to_html_node(markdown)
+    refs = collect_links(html_node)
+    html_node = rebase_links(html_node, basepath)
+    title = extract_title(markdown)
+    return {"Title": title, "Content": iter_html(html_node)}, refs
+
+
+def render_page_refs(markdown, template, basepath):
+    values, refs = page_values(markdown, basepath)
+    return template.render(values), refs
+
+
+def render_page(markdown, template, basepath):
+    return render_page_refs(markdown, template, basepath)[0]
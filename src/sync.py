@@ -0,0 +1,197 @@
+import errno
+import hashlib
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from discovery import scan_files
+
+SYNC_STATE_NAME = ".sync-state.json"
+LINK_MODES = ("copy", "reflink", "hardlink")
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+_NO_CLONE = {errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY, errno.EPERM}
+_NO_KERNEL_COPY = _NO_CLONE | {errno.ENOSYS, errno.EBADF}
+COPY_CHUNK = 8 << 20
+DEFAULT_WORKERS = 8
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_sync_state(dest_root):
+    path = os.path.join(dest_root, SYNC_STATE_NAME)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_sync_state(dest_root, state):
+    os.makedirs(dest_root, exist_ok=True)
+    path = os.path.join(dest_root, SYNC_STATE_NAME)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def reflink(src, dst):
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+    with open(src, "rb") as source, open(dst, "wb") as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        except OSError as e:
+            if e.errno in _NO_CLONE:
+                return False
+            raise
+    shutil.copystat(src, dst)
+    return True
+
+
+def _kernel_copy(copy, source, target, size):
+    # copy_file_range and sendfile keep the bytes inside the kernel; returns
+    # False before anything was written if the filesystem refuses
+    offset = 0
+    while offset < size:
+        try:
+            sent = copy(source, target, offset, min(COPY_CHUNK, size - offset))
+        except OSError as e:
+            if offset == 0 and e.errno in _NO_KERNEL_COPY:
+                return False
+            raise
+        if sent == 0:
+            break
+        offset += sent
+    return True
+
+
+def _copy_file_range(source, target, offset, count):
+    return os.copy_file_range(source, target, count, offset, offset)
+
+
+def _sendfile(source, target, offset, count):
+    return os.sendfile(target, source, offset, count)
+
+
+KERNEL_COPIES = (("copy_file_range", _copy_file_range), ("sendfile", _sendfile))
+
+
+def fast_copy(src, dst):
+    with open(src, "rb") as source, open(dst, "wb") as target:
+        size = os.fstat(source.fileno()).st_size
+        copied = False
+        for name, copy in KERNEL_COPIES:
+            if hasattr(os, name) and _kernel_copy(
+                    copy, source.fileno(), target.fileno(), size):
+                copied = True
+                break
+        if not copied:
+            shutil.copyfileobj(source, target, COPY_CHUNK)
+    # keep the source mtime, which is what the next sync compares
+    shutil.copystat(src, dst)
+
+
+def place_file(src, dst, link="copy"):
+    # never write through an existing file: it may be a hard link to src
+    if os.path.lexists(dst):
+        os.remove(dst)
+    if link == "hardlink":
+        try:
+            os.link(src, dst)
+            return "linked"
+        except OSError:
+            pass
+    if link in ("reflink", "hardlink"):
+        try:
+            if reflink(src, dst):
+                return "linked"
+        except OSError:
+            pass
+        if os.path.lexists(dst):
+            os.remove(dst)
+    fast_copy(src, dst)
+    return "copied"
+
+
+def is_unchanged(src, src_stat, dst, use_hash):
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return False
+    if dst_stat.st_size != src_stat.st_size:
+        return False
+    if dst_stat.st_mtime_ns == src_stat.st_mtime_ns:
+        return True
+    # only a moved mtime is worth hashing for
+    if not use_hash:
+        return False
+    if hash_file(src) != hash_file(dst):
+        return False
+    # same bytes but a fresh mtime (e.g. a new checkout): adopt the source
+    # mtime so the cheap check succeeds next time
+    os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return True
+
+
+def remove_output(dest_root, rel_path):
+    path = os.path.join(dest_root, rel_path)
+    if os.path.lexists(path):
+        os.remove(path)
+    # the parent may already be gone, e.g. pruned when this output was
+    # removed before; climb to the first directory that still exists
+    parent = os.path.dirname(path)
+    while os.path.abspath(parent) != os.path.abspath(dest_root):
+        try:
+            if os.listdir(parent):
+                break
+            os.rmdir(parent)
+        except FileNotFoundError:
+            pass
+        parent = os.path.dirname(parent)
+
+
+def _sync_file(job):
+    src, dst, src_stat, use_hash, link = job
+    if is_unchanged(src, src_stat, dst, use_hash):
+        return "unchanged"
+    return place_file(src, dst, link)
+
+
+def sync_tree(src_root, dest_root, previous=None, use_hash=False, link="copy", workers=DEFAULT_WORKERS):
+    # previous is the state returned by the last sync; it says which files
+    # in dest_root came from src_root, so stale ones can be deleted without
+    # touching anything else that lives there
+    if link not in LINK_MODES:
+        raise ValueError(f"unknown link mode: {link}")
+    previous = previous or {}
+    stats = {"copied": 0, "linked": 0, "unchanged": 0, "deleted": 0, "bytes": 0}
+    current = {}
+    jobs = []
+    # list the whole tree and create every directory up front, so the
+    # workers only ever compare and copy files
+    for rel_path, src_stat in sorted(scan_files(src_root).items()):
+        dst = os.path.join(dest_root, rel_path)
+        jobs.append((os.path.join(src_root, rel_path), dst, src_stat, use_hash, link))
+        current[rel_path] = {"size": src_stat.st_size, "mtime": src_stat.st_mtime_ns}
+    for dst_dir in sorted({os.path.dirname(job[1]) for job in jobs}):
+        os.makedirs(dst_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for job, outcome in zip(jobs, executor.map(_sync_file, jobs)):
+            stats[outcome] += 1
+            if outcome != "unchanged":
+                stats["bytes"] += job[2].st_size
+    for rel_path in previous:
+        if rel_path not in current:
+            remove_output(dest_root, rel_path)
+            stats["deleted"] += 1
+    return current, stats
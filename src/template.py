@@ -0,0 +1,118 @@
+import os
+import re
+
+SLOT_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+PARTIAL_PATTERN = re.compile(r"\{\{> ([\w-]+) \}\}")
+PARTIALS_DIR = "partials"
+
+_compiled_templates = {}
+
+
+class Template():
+    def __init__(self, literals, slots, dependencies=()):
+        # literals always has exactly one more entry than slots
+        self.literals = literals
+        self.slots = slots
+        # the template file and every partial it pulled in
+        self.dependencies = list(dependencies)
+
+    def render(self, values):
+        return "".join(self.iter_render(values))
+
+    def iter_render(self, values):
+        # a slot value is either a string or an iterable of string chunks
+        yield self.literals[0]
+        for (name, raw), literal in zip(self.slots, self.literals[1:]):
+            value = values.get(name, raw)
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+            yield literal
+
+    def write(self, fp, values):
+        fp.writelines(self.iter_render(values))
+
+    def __eq__(self, other):
+        return self.literals == other.literals and self.slots == other.slots
+
+    def __repr__(self):
+        return f"Template({self.literals}, {self.slots})"
+
+
+def apply_basepath(text, basepath):
+    return text.replace("href=\"/", f"href=\"{basepath}").replace("src=\"/", f"src=\"{basepath}")
+
+
+def template_for(template_path, rel_dir):
+    # content/blog/tom/ renders with template.blog.tom.html, then
+    # template.blog.html, then template.html, whichever exists first
+    parts = [part for part in rel_dir.replace(os.sep, "/").split("/") if part]
+    root, ext = os.path.splitext(template_path)
+    while parts:
+        candidate = f"{root}.{".".join(parts)}{ext}"
+        if os.path.isfile(candidate):
+            return candidate
+        parts.pop()
+    return template_path
+
+
+def expand_partials(template_contents, partials_dir, dependencies, including=()):
+    def include(match):
+        name = match.group(1)
+        if name in including:
+            raise Exception(f"partial {name} includes itself")
+        path = os.path.join(partials_dir, f"{name}.html")
+        if not os.path.isfile(path):
+            raise Exception(f"missing partial {name}: {path}")
+        with open(path) as f:
+            contents = f.read()
+        if path not in dependencies:
+            dependencies.append(path)
+        return expand_partials(contents, partials_dir, dependencies, including + (name,))
+    return PARTIAL_PATTERN.sub(include, template_contents)
+
+
+def read_template(template_path):
+    # {{> name }} pulls in partials/name.html from beside the template
+    dependencies = [template_path]
+    with open(template_path) as f:
+        contents = f.read()
+    partials_dir = os.path.join(os.path.dirname(template_path), PARTIALS_DIR)
+    return expand_partials(contents, partials_dir, dependencies), dependencies
+
+
+def compile_template(template_contents, basepath="/"):
+    rewritten = apply_basepath(template_contents, basepath)
+    literals = []
+    slots = []
+    position = 0
+    for match in SLOT_PATTERN.finditer(rewritten):
+        literals.append(rewritten[position:match.start()])
+        slots.append((match.group(1), match.group(0)))
+        position = match.end()
+    literals.append(rewritten[position:])
+    return Template(literals, slots)
+
+
+def stamp(paths):
+    stamps = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamps.append((stat.st_mtime_ns, stat.st_size))
+    return stamps
+
+
+def load_template(template_path, basepath="/"):
+    key = (template_path, basepath)
+    cached = _compiled_templates.get(key)
+    if cached is not None and cached[0] == stamp(cached[1].dependencies):
+        return cached[1]
+    contents, dependencies = read_template(template_path)
+    template = compile_template(contents, basepath)
+    template.dependencies = dependencies
+    _compiled_templates[key] = (stamp(dependencies), template)
+    return template
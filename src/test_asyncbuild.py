@@ -0,0 +1,69 @@
+import asyncio
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from asyncbuild import build_pages_async, generate_pages_async
+from fixtures import TempDirTestCase, read, write
+from parallel import discover_pages, process_pool
+from supporting import generate_pages_recursive
+
+
+class TestAsyncBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = f"{self.root}/content"
+        self.template = f"{self.root}/template.html"
+        write(self.template, '<link href="/a.css">{{ Content }}')
+        write(f"{self.root}/template.blog.html", "<b>{{ Content }}</b>")
+        for i in range(10):
+            write(f"{self.content}/blog/post{i}/index.md", f"# Post {i}\n\n[home](/)")
+        write(f"{self.content}/index.md", "# Home\n\n- one\n- two")
+
+    def assert_matches_serial(self, dest):
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, f"{self.root}/serial", "/base/")
+        pages = discover_pages(self.content, f"{self.root}/serial")
+        self.assertEqual(len(pages), 11)
+        for _, serial_path in pages:
+            self.assertEqual(read(serial_path),
+                             read(serial_path.replace("/serial/", f"/{dest}/")))
+
+    def test_matches_serial_output(self):
+        serial_refs = {}
+        async_refs = {}
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(self.content, self.template, f"{self.root}/refs",
+                                     "/base/", page_refs=serial_refs)
+            stats = generate_pages_async(
+                self.content, self.template, f"{self.root}/async", "/base/", 2,
+                page_refs=async_refs)
+        self.assertEqual(async_refs, serial_refs)
+        with redirect_stdout(StringIO()):
+            again = generate_pages_async(
+                self.content, self.template, f"{self.root}/async", "/base/", 2)
+        self.assertEqual(stats, {"pages": 11, "written": 11, "unchanged": 0})
+        self.assertEqual(again["unchanged"], 11)
+        self.assert_matches_serial("async")
+
+    def test_process_pool_parsing(self):
+        with process_pool(2) as executor, redirect_stdout(StringIO()):
+            asyncio.run(build_pages_async(
+                self.content, self.template, f"{self.root}/procs", "/base/",
+                render_executor=executor))
+        self.assert_matches_serial("procs")
+
+    def test_errors_reported_per_page(self):
+        write(f"{self.content}/broken/index.md", "no title here")
+        out = StringIO()
+        with redirect_stdout(out):
+            with self.assertRaises(Exception):
+                generate_pages_async(self.content, self.template, f"{self.root}/docs", "/")
+        self.assertIn("broken/index.md", out.getvalue())
+        self.assertTrue(os.path.exists(f"{self.root}/docs/index.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
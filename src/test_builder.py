@@ -0,0 +1,86 @@
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from builder import Site
+from fixtures import TempDirTestCase, write
+
+
+class TestSite(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.root
+        write(f"{root}/template.html", '<link href="/a.css">{{ Content }}')
+        write(f"{root}/template.blog.html", "<b>{{ Content }}</b>")
+        write(f"{root}/content/index.md", "# Home\n\n[post](/blog/post)")
+        write(f"{root}/content/blog/post/index.md", "# Post\n\n![x](/missing.png)")
+        write(f"{root}/static/a.css", "a {}")
+        self.site = Site(f"{root}/content", f"{root}/template.html",
+                         f"{root}/static", f"{root}/docs", "/base/")
+
+    def test_build_in_memory(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            result = self.site.build_in_memory(check_links=True)
+        self.assertEqual(out.getvalue(), "")
+        self.assertFalse(os.path.exists(f"{self.root}/docs"))
+        self.assertEqual(result.pages, ["blog/post/index.html", "index.html"])
+        self.assertEqual(result.assets, ["a.css"])
+        self.assertEqual(
+            result.outputs["index.html"],
+            b'<link href="/base/a.css"><div><h1>Home</h1>'
+            b'<p><a href="/base/blog/post">post</a></p></div>')
+        self.assertTrue(result.outputs["blog/post/index.html"].startswith(b"<b>"))
+        self.assertNotIn("a.css", result.outputs)
+        self.assertEqual(result.broken_links,
+                         {"blog/post/index.html": [["image", "/missing.png"]]})
+
+    def test_include_assets(self):
+        result = self.site.build_in_memory(include_assets=True)
+        self.assertEqual(result.outputs["a.css"], b"a {}")
+
+    def test_overrides_and_errors(self):
+        result = self.site.build_in_memory(overrides={
+            "index.md": "# Draft",
+            "drafts/new.md": "no title",
+        })
+        self.assertIn(b"<h1>Draft</h1>", result.outputs["index.html"])
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(result.errors[0][0], "drafts/new.md")
+        self.assertNotIn("drafts/new.html", result.outputs)
+
+    def test_render_markdown(self):
+        self.assertEqual(self.site.render_markdown("# T", "blog"),
+                         b"<b><div><h1>T</h1></div></b>")
+
+    def test_build_to_disk_matches_memory(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            result = self.site.build()
+            again = self.site.build()
+        self.assertEqual(out.getvalue(), "")
+        self.assertEqual((result.written, result.unchanged), (2, 0))
+        self.assertEqual((again.written, again.unchanged), (0, 2))
+        self.assertEqual(result.asset_stats["copied"], 1)
+        memory = self.site.build_in_memory(include_assets=True)
+        for path, data in memory.outputs.items():
+            with open(f"{self.root}/docs/{path}", "rb") as f:
+                self.assertEqual(f.read(), data)
+
+    def test_build_removes_deleted_pages(self):
+        self.site.build()
+        os.remove(f"{self.root}/content/blog/post/index.md")
+        self.site.build()
+        self.assertFalse(os.path.exists(f"{self.root}/docs/blog"))
+        self.assertTrue(os.path.exists(f"{self.root}/docs/index.html"))
+
+    def test_build_needs_output(self):
+        site = Site(f"{self.root}/content", f"{self.root}/template.html")
+        with self.assertRaises(ValueError):
+            site.build()
+        self.assertEqual(len(site.build_in_memory().pages), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
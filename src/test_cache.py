@@ -0,0 +1,120 @@
+import os
+import unittest
+
+import supporting
+from cache import RenderCache
+from fixtures import TempDirTestCase
+from supporting import (
+    inline_cache_info,
+    markdown_to_html_node,
+    render_page,
+    render_page_refs,
+    set_inline_cache_size,
+    set_render_cache,
+    text_to_html_nodes,
+)
+from template import compile_template
+
+
+class TestRenderCache(TempDirTestCase):
+    def tearDown(self):
+        set_render_cache(None)
+        super().tearDown()
+
+    def test_get_put(self):
+        cache = RenderCache(self.root)
+        key = cache.key("# hi")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "value")
+        self.assertEqual(cache.get(key), "value")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_version_changes_key(self):
+        self.assertNotEqual(RenderCache(self.root, version=1).key("x"),
+                            RenderCache(self.root, version=2).key("x"))
+
+    def test_lru_eviction(self):
+        cache = RenderCache(self.root, max_bytes=250)
+        keys = [cache.key(str(i)) for i in range(5)]
+        for i, key in enumerate(keys):
+            cache.put(key, "x" * 100)
+            os.utime(cache.path(key), ns=(i * 10**9, i * 10**9))
+            if i == 1:
+                cache.get(keys[0])
+                os.utime(cache.path(keys[0]), ns=(10**10, 10**10))
+        self.assertLessEqual(cache.size(), 250)
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNotNone(cache.get(keys[4]))
+        self.assertIsNone(cache.get(keys[1]))
+
+    def test_cached_render_matches_uncached(self):
+        markdown = "# Title\n\n[home](/) and [x](https://a.b/c) ![i](/a.png)"
+        template = compile_template("<h1>{{ Title }}</h1>{{ Content }}", "/base/")
+        expected = render_page(markdown, template, "/base/")
+        set_render_cache(RenderCache(self.root))
+        self.assertEqual(render_page(markdown, template, "/base/"), expected)
+        self.assertEqual(render_page(markdown, template, "/base/"), expected)
+        self.assertEqual(supporting.get_render_cache().hits, 1)
+        self.assertEqual(
+            render_page(markdown, template, "/"),
+            expected.replace("/base/", "/"))
+
+    def test_hit_returns_links(self):
+        markdown = "# T\n\n[home](/) ![i](/a.png)"
+        template = compile_template("{{ Content }}")
+        set_render_cache(RenderCache(self.root))
+        first = render_page_refs(markdown, template, "/base/")
+        second = render_page_refs(markdown, template, "/base/")
+        self.assertEqual(supporting.get_render_cache().hits, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(tuple(second[1]), (["/"], ["/a.png"]))
+
+    def test_hit_skips_parsing(self):
+        set_render_cache(RenderCache(self.root))
+        template = compile_template("{{ Content }}")
+        render_page("# T\n\nbody", template, "/")
+        original = supporting.markdown_to_html_node
+        supporting.markdown_to_html_node = None
+        try:
+            self.assertEqual(render_page("# T\n\nbody", template, "/"),
+                             "<div><h1>T</h1><p>body</p></div>")
+        finally:
+            supporting.markdown_to_html_node = original
+
+
+class TestInlineMemo(unittest.TestCase):
+    def setUp(self):
+        set_inline_cache_size(16)
+
+    def tearDown(self):
+        set_inline_cache_size(supporting.INLINE_CACHE_SIZE)
+
+    def test_hits_and_misses(self):
+        text_to_html_nodes("a **b** [c](/d)")
+        text_to_html_nodes("a **b** [c](/d)")
+        info = inline_cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_returns_fresh_lists(self):
+        first = text_to_html_nodes("x _y_")
+        first.append(None)
+        self.assertEqual(len(text_to_html_nodes("x _y_")), 2)
+
+    def test_bounded(self):
+        for i in range(40):
+            text_to_html_nodes(f"item {i}")
+        self.assertEqual(inline_cache_info().currsize, 16)
+
+    def test_shared_leaves_not_rebased_twice(self):
+        template = compile_template("{{ Content }}", "/base/")
+        markdown = "# T\n\n[home](/)"
+        first = render_page(markdown, template, "/base/")
+        second = render_page(markdown, template, "/base/")
+        self.assertEqual(first, second)
+        self.assertIn('href="/base/"', second)
+        html = markdown_to_html_node(markdown).to_html()
+        self.assertIn('href="/"', html)
+
+
+if __name__ == "__main__":
+    unittest.main()
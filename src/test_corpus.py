@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+
+from corpus import generate_corpus, generate_markdown, page_rel_path
+from supporting import extract_title, markdown_to_html_node
+
+
+class TestCorpus(unittest.TestCase):
+    def test_markdown_is_deterministic(self):
+        self.assertEqual(generate_markdown(3), generate_markdown(3))
+        self.assertNotEqual(generate_markdown(3), generate_markdown(4))
+
+    def test_markdown_renders(self):
+        markdown = generate_markdown(
+            7, paragraphs=20, list_density=0.3, quote_density=0.3,
+            code_density=0.3, links_per_paragraph=3, images=4)
+        self.assertEqual(extract_title(markdown), "Generated page 7")
+        html = markdown_to_html_node(markdown).to_html()
+        self.assertEqual(html.count("<img"), 4)
+        self.assertGreaterEqual(html.count("<a "), 60)
+
+    def test_rel_path_depth(self):
+        self.assertEqual(page_rel_path(42, 0), "post-42/index.md")
+        self.assertEqual(page_rel_path(42, 2),
+                         "section-0-2/section-1-4/post-42/index.md")
+
+    def test_generate_corpus(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = generate_corpus(tmp, 5, depth=1)
+            self.assertEqual(len(paths), 5)
+            self.assertTrue(all(os.path.exists(path) for path in paths))
+
+
+if __name__ == "__main__":
+    unittest.main()
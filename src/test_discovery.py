@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+from discovery import Inventory, list_dir, load_inventory, save_inventory, scan_files
+from fixtures import TempDirTestCase, write
+
+
+def age(path, seconds=60):
+    # pushes a directory's mtime out of the racy window
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - seconds * 10**9))
+
+
+class TestInventory(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        write(f"{self.root}/index.md")
+        write(f"{self.root}/blog/tom/index.md")
+        write(f"{self.root}/blog/tom/pic.png")
+        write(f"{self.root}/about/index.md")
+        for rel_dir in ("", "blog", "blog/tom", "about"):
+            age(os.path.join(self.root, rel_dir))
+
+    def test_list_dir(self):
+        self.assertEqual(list_dir(self.root), (["index.md"], ["about", "blog"]))
+
+    def test_scan_files(self):
+        found = scan_files(self.root)
+        self.assertEqual(sorted(found), [
+            "about/index.md", "blog/tom/index.md", "blog/tom/pic.png", "index.md"])
+        self.assertEqual(found["index.md"].st_size, 0)
+        self.assertEqual(scan_files(f"{self.root}/missing"), {})
+
+    def test_sorted_and_filtered(self):
+        inventory = Inventory.scan(self.root)
+        self.assertEqual(inventory.paths(), [
+            "about/index.md", "blog/tom/index.md", "blog/tom/pic.png", "index.md"])
+        self.assertEqual(inventory.paths(".png"), ["blog/tom/pic.png"])
+
+    def test_refresh_only_lists_changed_directories(self):
+        inventory = Inventory.scan(self.root)
+        self.assertEqual(inventory.listed, 4)
+        inventory.refresh()
+        self.assertEqual(inventory.listed, 0)
+        write(f"{self.root}/blog/tom/new.md")
+        inventory.refresh()
+        self.assertEqual(inventory.listed, 1)
+        self.assertIn("blog/tom/new.md", inventory.paths())
+
+    def test_removed_directory_dropped(self):
+        inventory = Inventory.scan(self.root)
+        os.remove(f"{self.root}/about/index.md")
+        os.rmdir(f"{self.root}/about")
+        self.assertEqual(inventory.refresh().paths(), [
+            "blog/tom/index.md", "blog/tom/pic.png", "index.md"])
+        self.assertNotIn("about/", inventory.dirs)
+
+    def test_recent_directories_are_relisted(self):
+        write(f"{self.root}/fresh/index.md")
+        inventory = Inventory.scan(self.root)
+        inventory.refresh()
+        # the root and fresh/ were both modified just now
+        self.assertEqual(inventory.listed, 2)
+
+    def test_save_and_load(self):
+        cache = tempfile.TemporaryDirectory()
+        self.addCleanup(cache.cleanup)
+        path = f"{cache.name}/inventory.json"
+        save_inventory(path, Inventory.scan(self.root))
+        inventory = load_inventory(path, self.root).refresh()
+        self.assertEqual(inventory.listed, 0)
+        self.assertEqual(len(inventory.paths()), 4)
+        self.assertEqual(load_inventory(path, "/elsewhere").dirs, {})
+        self.assertEqual(load_inventory(f"{self.root}/missing.json", self.root).dirs, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 from htmlnode import string_dict, HTMLNode, LeafNode, ParentNode
-from supporting import split_nodes_delimiter, extract_markdown_images, split_nodes_image, text_to_textnodes
+from supporting import split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes
 from textnode import TextNode, TextType
 
 
@@ -161,5 +161,37 @@ class TestSplitNodesDelimiter(unittest.TestCase):
         )
 
 
+class TestGrammar(unittest.TestCase):
+    def test_link_pattern_skips_images(self):
+        text = "![img](a.png) and [link](b.html)"
+        self.assertEqual(extract_markdown_links(text), [("link", "b.html")])
+        self.assertEqual(extract_markdown_images(text), [("img", "a.png")])
+
+    def test_split_links_leaves_images(self):
+        node = TextNode("![img](a.png) then [link](b)", TextType.TEXT)
+        self.assertEqual(
+            split_nodes_link([node]),
+            [
+                TextNode("![img](a.png) then ", TextType.TEXT),
+                TextNode("link", TextType.LINK, "b"),
+            ],
+        )
+
+    def test_split_repeated_identical_links(self):
+        node = TextNode("[a](u) x [a](u)", TextType.TEXT)
+        self.assertEqual(
+            split_nodes_link([node]),
+            [
+                TextNode("a", TextType.LINK, "u"),
+                TextNode(" x ", TextType.TEXT),
+                TextNode("a", TextType.LINK, "u"),
+            ],
+        )
+
+    def test_no_match_keeps_node(self):
+        node = TextNode("plain", TextType.TEXT)
+        self.assertIs(split_nodes_image([node])[0], node)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from io import StringIO
+
+from htmlnode import HTMLNode, LeafNode, ParentNode, iter_html, write_html
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -52,5 +54,30 @@ class TestParentNode(unittest.TestCase):
         )
 
 
+class TestStreamingSerializer(unittest.TestCase):
+    def test_iter_html_chunks(self):
+        node = ParentNode("p", [LeafNode("b", "x"), LeafNode(None, "y")])
+        self.assertEqual(list(iter_html(node)), ["<p>", "<b>x</b>", "y", "</p>"])
+
+    def test_write_html(self):
+        node = ParentNode("div", [ParentNode("p", [LeafNode("i", "z")])])
+        out = StringIO()
+        write_html(node, out)
+        self.assertEqual(out.getvalue(), "<div><p><i>z</i></p></div>")
+
+    def test_deep_nesting(self):
+        node = LeafNode(None, "leaf")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(len(html), 5000 * len("<span></span>") + len("leaf"))
+
+    def test_nested_errors_still_raised(self):
+        node = ParentNode("div", [ParentNode("p", [])])
+        with self.assertRaises(ValueError):
+            node.to_html()
+
+
 if __name__ == "__main__":
     unittest.main()
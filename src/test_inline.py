@@ -0,0 +1,125 @@
+import ast
+import os
+import random
+import unittest
+from inline import tokenize_inline
+from supporting import split_nodes_delimiter, split_nodes_image, split_nodes_link
+from textnode import TextNode, TextType
+
+
+def pipeline_text_to_textnodes(text):
+    # the original five-stage pipeline, kept here as the reference
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    return split_nodes_link(nodes)
+
+
+CASES = [
+    "This is text with a **bolded** word",
+    "This is text with a **bolded** word and **another**",
+    "This is text with a **bolded word** and **another**",
+    "This is text with an _italic_ word",
+    "**bold** and _italic_",
+    "This is text with a `code block` word",
+    "This is text with an ![image](https://i.imgur.com/zjjcJKZ.png)",
+    "![image](https://www.example.COM/IMAGE.PNG)",
+    "This is text with an ![image](https://i.imgur.com/zjjcJKZ.png) and another ![second image](https://i.imgur.com/3elNhQu.png)",
+    "This is text with a [link](https://boot.dev) and [another link](https://blog.boot.dev) with text that follows",
+    "This is text with a [link](https://boot.dev) and [another link](https://blog.boot.dev)",
+    "This is **text** with an _italic_ word and a `code block` and an ![image](https://i.imgur.com/zjjcJKZ.png) and a [link](https://boot.dev)",
+    "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)",
+    "This is **bolded** paragraph text in a p tag here",
+    "This is another paragraph with _italic_ text and `code` here",
+    "This is a heading with **bold**",
+    "Item 2 with **bold**",
+    "Second item with `code`",
+    "plain text only",
+    "",
+    "****",
+    "[< Back Home](/)",
+    "a [broken link(no) and [x] (y) [z](w)",
+    "an ![broken image and [ok](u)",
+    "See [![logo](/images/tom.png)](https://example.com)",
+    "[a ![i](u) b](v)",
+    "[a](b ![i](u) c)",
+    "[![a](b)](c) and [d](e)",
+]
+
+
+def suite_strings(*names):
+    # every string literal in the older suites, so inputs added there are
+    # checked against the pipeline here too
+    strings = []
+    for name in names:
+        with open(os.path.join(os.path.dirname(__file__), name)) as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                strings.append(node.value)
+    return strings
+
+
+def assert_matches_pipeline(case, text):
+    # inputs the pipeline rejects are nested delimiters, which the
+    # tokenizer is allowed to read differently
+    try:
+        expected = pipeline_text_to_textnodes(text)
+    except Exception:
+        return
+    case.assertEqual(tokenize_inline(text), expected, repr(text))
+
+
+class TestTokenizeInline(unittest.TestCase):
+    def test_matches_pipeline(self):
+        for text in CASES:
+            with self.subTest(text=text):
+                self.assertEqual(
+                    tokenize_inline(text), pipeline_text_to_textnodes(text))
+
+    def test_matches_pipeline_on_suite_strings(self):
+        for text in suite_strings("test_general.py", "test_bootdev.py"):
+            assert_matches_pipeline(self, text)
+
+    def test_matches_pipeline_on_nested_brackets(self):
+        rng = random.Random(0)
+        for _ in range(20000):
+            text = "".join(rng.choice("[]()!ab \n") for _ in range(rng.randint(0, 30)))
+            assert_matches_pipeline(self, text)
+
+    def test_linked_image_keeps_image(self):
+        self.assertEqual(
+            tokenize_inline("See [![logo](/images/tom.png)](https://example.com)"),
+            [
+                TextNode("See [", TextType.TEXT),
+                TextNode("logo", TextType.IMAGE, "/images/tom.png"),
+                TextNode("](https://example.com)", TextType.TEXT),
+            ],
+        )
+
+    def test_unclosed_delimiter_raises(self):
+        for text in ["a **b", "a _b", "a `b"]:
+            with self.subTest(text=text):
+                with self.assertRaises(Exception):
+                    tokenize_inline(text)
+
+    def test_link_with_underscores_stays_whole(self):
+        self.assertEqual(
+            tokenize_inline("see [docs](https://x.dev/a_b_c)"),
+            [
+                TextNode("see ", TextType.TEXT),
+                TextNode("docs", TextType.LINK, "https://x.dev/a_b_c"),
+            ],
+        )
+
+    def test_link_heavy_paragraph(self):
+        text = " ".join(f"[l{i}](/p/{i})" for i in range(2000))
+        nodes = tokenize_inline(text)
+        self.assertEqual(len(nodes), 3999)
+        self.assertEqual(nodes[-1], TextNode("l1999", TextType.LINK, "/p/1999"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import time
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from fixtures import TempDirTestCase, write
+from linkgraph import LinkIndex, link_keys, page_links, resolve, target_exists
+import supporting
+from manifest import check_links, incremental_build, load_manifest
+from supporting import generate_pages_recursive
+
+
+class TestLinkIndex(unittest.TestCase):
+    def test_page_links(self):
+        links, images = page_links(
+            "# T\n\n[a](/blog) and ![pic](/images/x.png)\n\n- [b](https://x.dev)")
+        self.assertEqual(links, ["/blog", "https://x.dev"])
+        self.assertEqual(images, ["/images/x.png"])
+
+    def test_resolve(self):
+        self.assertEqual(resolve("/blog/post#top", "index.html"), "blog/post")
+        self.assertEqual(resolve("../a/", "blog/post/index.html"), "blog/a")
+        self.assertEqual(resolve("/", "blog/index.html"), "")
+        self.assertIsNone(resolve("https://example.com/", "index.html"))
+        self.assertIsNone(resolve("mailto:me@example.com", "index.html"))
+        self.assertIsNone(resolve("#section", "index.html"))
+
+    def test_target_exists(self):
+        outputs = {"index.html", "blog/post/index.html", "about.html", "a.png"}
+        self.assertTrue(target_exists("", outputs))
+        self.assertTrue(target_exists("blog/post", outputs))
+        self.assertTrue(target_exists("about", outputs))
+        self.assertTrue(target_exists("a.png", outputs))
+        self.assertFalse(target_exists("blog", outputs))
+        self.assertEqual(link_keys("blog/post/index.html"),
+                         {"blog/post/index.html", "blog/post"})
+
+    def test_check_and_inbound(self):
+        index = LinkIndex()
+        index.set_page("index.html", ["/blog/post", "/missing"], ["/a.png"])
+        index.set_page("blog/post/index.html", ["/"], ["/gone.png"])
+        outputs = {"index.html", "blog/post/index.html", "a.png"}
+        self.assertEqual(index.check(outputs), {
+            "index.html": [["link", "/missing"]],
+            "blog/post/index.html": [["image", "/gone.png"]],
+        })
+        self.assertEqual(index.linking_to(["blog/post/index.html"]), {"index.html"})
+        index.remove_page("blog/post/index.html")
+        self.assertEqual(list(index.broken), ["index.html"])
+
+    def test_inbound_follows_edits(self):
+        index = LinkIndex()
+        index.set_page("index.html", ["/blog"], [])
+        index.set_page("about.html", ["/blog", "/"], [])
+        self.assertEqual(index.linking_to(["blog/index.html"]), {"index.html", "about.html"})
+        index.set_page("about.html", ["/"], ["/a.png"])
+        index.remove_page("index.html")
+        self.assertEqual(index.linking_to(["blog/index.html"]), set())
+        self.assertEqual(index.linking_to(["a.png"]), {"about.html"})
+        self.assertEqual(index.inbound(), LinkIndex(index.pages).inbound())
+
+
+class TestIncrementalLinkCheck(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        write(self.template, "{{ Content }}")
+        write(os.path.join(self.content, "index.md"),
+              "# Home\n\n[post](/blog/post) ![logo](/logo.png)")
+        write(os.path.join(self.content, "blog/post/index.md"),
+              "# Post\n\n[home](/) [other](../other)")
+        write(os.path.join(self.static, "logo.png"), "png")
+
+    def build(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            stats = incremental_build(
+                self.content, self.template, self.static, self.docs, "/")
+        return stats, out.getvalue()
+
+    def test_each_page_parsed_once(self):
+        with mock.patch("supporting.markdown_to_html_node",
+                        wraps=supporting.markdown_to_html_node) as parse:
+            stats, _ = self.build()
+        self.assertEqual(parse.call_count, 2)
+        self.assertEqual(stats["broken"], 1)
+
+    def test_reports_broken_links(self):
+        stats, out = self.build()
+        self.assertEqual(stats["broken"], 1)
+        self.assertIn("broken link in blog/post/index.html: ../other", out)
+
+    def test_new_target_fixes_referrer(self):
+        self.build()
+        write(os.path.join(self.content, "blog/other.md"), "# Other")
+        stats, _ = self.build()
+        self.assertEqual(stats["broken"], 0)
+
+    def test_removed_target_breaks_referrer(self):
+        self.build()
+        os.remove(os.path.join(self.static, "logo.png"))
+        stats, out = self.build()
+        self.assertEqual(stats["broken"], 2)
+        self.assertIn("broken image in index.html: /logo.png", out)
+
+    def test_changed_page_is_reindexed(self):
+        self.build()
+        time.sleep(0.01)
+        write(os.path.join(self.content, "blog/post/index.md"), "# Post\n\n[home](/)")
+        stats, _ = self.build()
+        self.assertEqual(stats["broken"], 0)
+        manifest = load_manifest(self.docs)
+        self.assertEqual(manifest["links"]["pages"]["blog/post/index.html"]["links"], ["/"])
+
+    def test_full_check(self):
+        page_refs = {}
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, self.docs, "/ssg/", page_refs=page_refs)
+            broken = check_links(page_refs, self.static)
+        self.assertEqual(page_refs["index.html"], (["/blog/post"], ["/logo.png"]))
+        self.assertEqual(broken, {"blog/post/index.html": [["link", "../other"]]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from fixtures import TempDirTestCase, read, write
+from manifest import (
+    content_outputs,
+    incremental_build,
+    invalidate_manifest,
+    load_manifest,
+    page_output_path,
+    prune_pages,
+)
+from supporting import generate_pages_recursive
+
+
+class TestIncrementalBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        write(os.path.join(self.content, "index.md"), "# Home\n\nhello")
+        write(os.path.join(self.content, "blog/post/index.md"), "# Post\n\nbody")
+        write(os.path.join(self.static, "index.css"), "body {}")
+
+    def build(self):
+        with redirect_stdout(StringIO()):
+            return incremental_build(
+                self.content, self.template, self.static, self.docs, "/")
+
+    def test_first_build_renders_everything(self):
+        stats = self.build()
+        self.assertEqual(stats["rendered"], 2)
+        self.assertEqual(stats["copied"], 1)
+        self.assertEqual(
+            read(os.path.join(self.docs, "index.html")),
+            "<title>Home</title><div><h1>Home</h1><p>hello</p></div>",
+        )
+        manifest = load_manifest(self.docs)
+        self.assertEqual(
+            manifest["pages"]["blog/post/index.md"]["output"],
+            "blog/post/index.html",
+        )
+
+    def test_second_build_skips_unchanged(self):
+        self.build()
+        stats = self.build()
+        self.assertEqual(stats["rendered"], 0)
+        self.assertEqual(stats["skipped"], 2)
+        self.assertEqual(stats["copied"], 0)
+
+    def test_only_edited_page_is_rendered(self):
+        self.build()
+        write(os.path.join(self.content, "index.md"), "# Home\n\nchanged")
+        stats = self.build()
+        self.assertEqual(stats["rendered"], 1)
+        self.assertIn("changed", read(os.path.join(self.docs, "index.html")))
+
+    def test_template_change_rebuilds_all(self):
+        self.build()
+        write(self.template, "<h2>{{ Title }}</h2>{{ Content }}")
+        stats = self.build()
+        self.assertEqual(stats["rendered"], 2)
+
+    def test_section_template_only_rebuilds_its_pages(self):
+        self.build()
+        write(os.path.join(self.root, "template.blog.html"), "<b>{{ Content }}</b>")
+        stats = self.build()
+        self.assertEqual(stats["rendered"], 1)
+        self.assertTrue(
+            read(os.path.join(self.docs, "blog/post/index.html")).startswith("<b>"))
+        write(self.template, "<h2>{{ Title }}</h2>{{ Content }}")
+        stats = self.build()
+        self.assertEqual(stats["rendered"], 1)
+        self.assertTrue(read(os.path.join(self.docs, "index.html")).startswith("<h2>"))
+
+    def test_partial_change_rebuilds_pages_using_it(self):
+        write(os.path.join(self.root, "template.blog.html"), "{{> nav }}{{ Content }}")
+        write(os.path.join(self.root, "partials/nav.html"), "nav1")
+        self.build()
+        manifest = load_manifest(self.docs)
+        self.assertEqual(
+            manifest["pages"]["blog/post/index.md"]["templates"],
+            [os.path.join(self.root, "template.blog.html"),
+             os.path.join(self.root, "partials/nav.html")],
+        )
+        write(os.path.join(self.root, "partials/nav.html"), "nav2")
+        stats = self.build()
+        self.assertEqual(stats["rendered"], 1)
+        self.assertTrue(
+            read(os.path.join(self.docs, "blog/post/index.html")).startswith("nav2"))
+
+    def test_deleted_sources_remove_outputs(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog/post/index.md"))
+        os.remove(os.path.join(self.static, "index.css"))
+        stats = self.build()
+        self.assertEqual(stats["removed"], 1)
+        self.assertEqual(stats["deleted"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.css")))
+
+    def test_missing_output_is_regenerated(self):
+        self.build()
+        os.remove(os.path.join(self.docs, "index.html"))
+        stats = self.build()
+        self.assertEqual(stats["rendered"], 1)
+
+    def test_full_build_in_between_invalidates_manifest(self):
+        write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/blog/post)")
+        self.build()
+        with redirect_stdout(StringIO()):
+            invalidate_manifest(self.docs)
+            generate_pages_recursive(self.content, self.template, self.docs, "/ssg/")
+        self.assertIn('href="/ssg/blog/post"', read(os.path.join(self.docs, "index.html")))
+        stats = self.build()
+        self.assertEqual(stats["rendered"], 2)
+        self.assertIn('href="/blog/post"', read(os.path.join(self.docs, "index.html")))
+
+    def full_build(self):
+        with redirect_stdout(StringIO()):
+            invalidate_manifest(self.docs)
+            generate_pages_recursive(self.content, self.template, self.docs, "/")
+            return prune_pages(self.docs, content_outputs(self.content))
+
+    def test_full_build_removes_deleted_pages(self):
+        write(os.path.join(self.docs, "notes.txt"), "not ours")
+        self.full_build()
+        os.remove(os.path.join(self.content, "blog/post/index.md"))
+        self.assertEqual(self.full_build(), ["blog/post/index.html"])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "notes.txt")))
+
+    def test_incremental_build_removes_pages_of_full_build(self):
+        self.full_build()
+        os.remove(os.path.join(self.content, "blog/post/index.md"))
+        stats = self.build()
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+
+    def test_page_output_path(self):
+        self.assertEqual(page_output_path("blog/tom/index.md"),
+                         "blog/tom/index.html")
+
+
+if __name__ == "__main__":
+    unittest.main()
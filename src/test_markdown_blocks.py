@@ -1,5 +1,27 @@
+import random
+import re
 import unittest
-from blocks import markdown_to_blocks, block_to_block_type, BlockType
+from blocks import markdown_to_blocks, block_to_block_type, scan_blocks, BlockType
+
+
+def reference_markdown_to_blocks(markdown):
+    splitted = markdown.split("\n\n")
+    return [x.strip() for x in splitted if x.strip() != ""]
+
+
+def reference_block_to_block_type(md_block):
+    splitted = md_block.split("\n")
+    if len(re.findall(r"#{1,6} \w.*", splitted[0])) == 1:
+        return BlockType.HEADING
+    if len(splitted) > 1 and md_block[:3] == "```" and md_block[-3:] == "```":
+        return BlockType.CODE
+    if all(line[0] == ">" for line in splitted):
+        return BlockType.QUOTE
+    if all(line[:2] == "- " for line in splitted):
+        return BlockType.UNORDERED_LIST
+    if all(line[:3] == f"{i}. " for i, line in enumerate(splitted, 1)):
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
 
 
 class TestMarkdownToHTML(unittest.TestCase):
@@ -61,5 +83,28 @@ This is the same paragraph on a new line
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
 
+class TestBlockScanner(unittest.TestCase):
+    PIECES = ["", "", " ", "  \t", "# head", "text", "  indented ", "> q",
+              "- item", "1. one", "2. two", "```", "code```", "x # y", "\r"]
+
+    def test_matches_split_and_strip(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            markdown = "\n".join(
+                rng.choice(self.PIECES) for _ in range(rng.randint(0, 12)))
+            with self.subTest(markdown=markdown):
+                expected = reference_markdown_to_blocks(markdown)
+                self.assertEqual(markdown_to_blocks(markdown), expected)
+                self.assertEqual(
+                    [block_type for block_type, _ in scan_blocks(markdown)],
+                    [reference_block_to_block_type(block) for block in expected])
+
+    def test_scan_blocks_hands_out_lines(self):
+        self.assertEqual(
+            list(scan_blocks("\n  - a\n- b  \n\n\n1. x")),
+            [(BlockType.UNORDERED_LIST, ["- a", "- b"]),
+             (BlockType.ORDERED_LIST, ["1. x"])])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,81 @@
+import os
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+
+from fixtures import TempDirTestCase, read, write
+from main import parse_args
+from parallel import discover_pages, generate_pages_parallel
+from supporting import generate_pages_recursive
+
+
+class TestParallelGeneration(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = f"{self.root}/content"
+        self.template = f"{self.root}/template.html"
+        write(self.template,
+              '<title>{{ Title }}</title><link href="/a.css">{{ Content }}')
+        for i in range(12):
+            write(f"{self.content}/blog/post{i}/index.md",
+                  f"# Post {i}\n\nsome **bold** text number {i}")
+        write(f"{self.content}/index.md", "# Home\n\n- one\n- two")
+
+    def test_discover_pages_sorted(self):
+        pages = discover_pages(self.content, "docs")
+        self.assertEqual(len(pages), 13)
+        self.assertEqual(pages, sorted(pages))
+        self.assertIn((f"{self.content}/index.md", "docs/index.html"), pages)
+
+    def test_matches_serial_output(self):
+        serial_refs = {}
+        parallel_refs = {}
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, f"{self.root}/serial", "/base/",
+                page_refs=serial_refs)
+            generate_pages_parallel(
+                self.content, self.template, f"{self.root}/parallel", "/base/", 2,
+                parallel_refs)
+        for _, serial_path in discover_pages(self.content, f"{self.root}/serial"):
+            parallel_path = serial_path.replace("/serial/", "/parallel/")
+            self.assertEqual(read(serial_path), read(parallel_path))
+        self.assertEqual(len(serial_refs), 13)
+        self.assertEqual(parallel_refs, serial_refs)
+
+    def test_section_templates_and_partials(self):
+        write(f"{self.root}/template.blog.html", "{{> nav }}{{ Content }}")
+        write(f"{self.root}/partials/nav.html", '<a href="/">blog</a>')
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, f"{self.root}/serial", "/base/")
+            generate_pages_parallel(
+                self.content, self.template, f"{self.root}/parallel", "/base/", 2)
+        post = read(f"{self.root}/parallel/blog/post3/index.html")
+        self.assertTrue(post.startswith('<a href="/base/">blog</a>'))
+        self.assertEqual(post, read(f"{self.root}/serial/blog/post3/index.html"))
+        self.assertTrue(
+            read(f"{self.root}/parallel/index.html").startswith("<title>"))
+
+    def test_errors_reported_per_page(self):
+        write(f"{self.content}/broken/index.md", "no title here")
+        out = StringIO()
+        with redirect_stdout(out):
+            with self.assertRaises(Exception):
+                generate_pages_parallel(
+                    self.content, self.template, f"{self.root}/docs", "/", 2)
+        self.assertIn("broken/index.md", out.getvalue())
+        self.assertTrue(os.path.exists(f"{self.root}/docs/index.html"))
+
+
+class TestJobsFlag(unittest.TestCase):
+    def test_incremental_rejects_jobs(self):
+        for argv in (["--incremental", "-j", "4"], ["--incremental", "--async"]):
+            with self.subTest(argv=argv), redirect_stderr(StringIO()):
+                with self.assertRaises(SystemExit):
+                    parse_args(argv)
+        self.assertEqual(parse_args(["-j", "4"]).jobs, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
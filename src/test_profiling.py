@@ -0,0 +1,95 @@
+import json
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import htmlnode
+import supporting
+from fixtures import TempDirTestCase
+from htmlnode import LeafNode, ParentNode
+from profiling import BuildProfiler
+from writer import InlineWriter
+
+
+class TestBuildProfiler(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        os.makedirs(f"{self.root}/content/blog")
+        for path, text in [("index.md", "# Home\n\nhi"),
+                           ("blog/index.md", "# Blog\n\n- a\n- b")]:
+            with open(f"{self.root}/content/{path}", "w") as f:
+                f.write(text)
+        with open(f"{self.root}/template.html", "w") as f:
+            f.write("{{ Title }}{{ Content }}")
+
+    def build(self):
+        writer = InlineWriter()
+        supporting.set_output_writer(writer)
+        try:
+            with redirect_stdout(StringIO()):
+                supporting.generate_pages_recursive(
+                    f"{self.root}/content", f"{self.root}/template.html",
+                    f"{self.root}/docs", "/")
+        finally:
+            supporting.set_output_writer(None)
+        return writer
+
+    def test_records_stages_and_pages(self):
+        profiler = BuildProfiler().install()
+        try:
+            writer = self.build()
+        finally:
+            profiler.uninstall()
+        self.assertEqual(profiler.stages["generate_page"][1], 2)
+        self.assertEqual(profiler.stages["markdown_to_html_node"][1], 2)
+        self.assertEqual(profiler.stages["to_html"][1], 2)
+        self.assertEqual(len(profiler.pages), 2)
+        summary = profiler.summary(top=1, writer=writer)
+        self.assertIn("slowest 1 pages", summary)
+        self.assertIn(f"pages written: 2 ({writer.bytes_written} bytes), 0 unchanged", summary)
+        self.assertGreater(writer.bytes_written, 0)
+        profiler = BuildProfiler().install()
+        try:
+            writer = self.build()
+        finally:
+            profiler.uninstall()
+        self.assertEqual(len(profiler.pages), 2)
+        self.assertIn("pages written: 0 (0 bytes), 2 unchanged",
+                      profiler.summary(writer=writer))
+
+    def test_nested_to_html_timed_once(self):
+        profiler = BuildProfiler().install()
+        try:
+            ParentNode("div", [ParentNode("p", [LeafNode("b", "x")])]).to_html()
+        finally:
+            profiler.uninstall()
+        self.assertEqual(profiler.stages["to_html"][1], 1)
+
+    def test_uninstall_restores_functions(self):
+        generate_page = supporting.generate_page
+        iter_html = htmlnode.iter_html
+        leaf_to_html = LeafNode.to_html
+        BuildProfiler().install().uninstall()
+        self.assertIs(supporting.generate_page, generate_page)
+        self.assertIs(htmlnode.iter_html, iter_html)
+        self.assertIs(LeafNode.to_html, leaf_to_html)
+
+    def test_chrome_trace(self):
+        profiler = BuildProfiler().install()
+        try:
+            self.build()
+        finally:
+            profiler.uninstall()
+        trace_path = f"{self.root}/trace.json"
+        profiler.write_trace(trace_path)
+        with open(trace_path) as f:
+            events = json.load(f)["traceEvents"]
+        self.assertTrue(all(event["ph"] == "X" for event in events))
+        pages = [e for e in events if e["name"] == "generate_page"]
+        self.assertEqual(len(pages), 2)
+        self.assertIn("page", pages[0]["args"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import http.client
+import json
+import os
+import socket
+import threading
+import unittest
+from unittest import mock
+
+import template
+from builder import Site
+from fixtures import TempDirTestCase, write
+from server import RenderService, make_server, percentile
+
+
+class TestRenderServer(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.root
+        write(f"{root}/template.html", "<title>{{ Title }}</title>{{ Content }}")
+        write(f"{root}/template.blog.html", "<b>{{ Content }}</b>")
+        write(f"{root}/content/index.md", "# Home")
+        self.service = RenderService(
+            Site(f"{root}/content", f"{root}/template.html", basepath="/base/"))
+        self.service.warm()
+
+    def serve(self, **kwargs):
+        server = make_server(self.service, **kwargs)
+        threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_render_and_stats_over_http(self):
+        server = self.serve(port=0)
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        for _ in range(3):
+            connection.request("POST", "/render", body="# Hi\n\n[x](/a)".encode())
+            response = connection.getresponse()
+            self.assertEqual(response.status, 200)
+            self.assertEqual(
+                response.read(),
+                b'<title>Hi</title><div><h1>Hi</h1><p><a href="/base/a">x</a></p></div>')
+        connection.request("POST", "/render?section=blog", body=b"# Post")
+        self.assertTrue(connection.getresponse().read().startswith(b"<b>"))
+        connection.request("POST", "/render", body=b"no title")
+        response = connection.getresponse()
+        response.read()
+        self.assertEqual(response.status, 400)
+        connection.request("GET", "/stats")
+        stats = json.loads(connection.getresponse().read())
+        self.assertEqual((stats["requests"], stats["errors"]), (5, 1))
+        self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+        connection.close()
+
+    def test_connections_bounded(self):
+        server = self.serve(port=0, max_connections=1)
+        port = server.server_address[1]
+        first = http.client.HTTPConnection("127.0.0.1", port)
+        first.request("POST", "/render", body=b"# One")
+        self.assertTrue(first.getresponse().read().endswith(b"<h1>One</h1></div>"))
+        second = http.client.HTTPConnection("127.0.0.1", port, timeout=0.2)
+        second.request("POST", "/render", body=b"# Two")
+        with self.assertRaises(TimeoutError):
+            second.getresponse()
+        first.close()
+        second.sock.settimeout(5)
+        response = second.getresponse()
+        self.assertTrue(response.read().endswith(b"<h1>Two</h1></div>"))
+        second.close()
+
+    def test_bad_requests_answered(self):
+        server = self.serve(port=0)
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        connection.request("POST", "/render", body=b"# \xff")
+        response = connection.getresponse()
+        self.assertIn(b"utf-8", response.read())
+        self.assertEqual(response.status, 400)
+        connection.request("POST", "/render", body=b"# Ok")
+        self.assertEqual(connection.getresponse().status, 200)
+        connection.close()
+        for length in (b"abc", b"-1"):
+            with socket.create_connection(server.server_address) as client:
+                client.sendall(b"POST /render HTTP/1.1\r\nContent-Length: " + length
+                               + b"\r\n\r\n# Hi")
+                data = b""
+                while chunk := client.recv(4096):
+                    data += chunk
+            self.assertTrue(data.startswith(b"HTTP/1.1 400"), data)
+
+    def test_warm_compiles_templates_only(self):
+        write(f"{self.root}/content/blog/post.md", "# Post")
+        template._compiled_templates.clear()
+        with mock.patch("supporting.markdown_to_html_node") as parse:
+            self.service.warm()
+        parse.assert_not_called()
+        self.assertEqual(sorted(path for path, _ in template._compiled_templates), [
+            f"{self.root}/template.blog.html", f"{self.root}/template.html"])
+
+    def test_unix_socket(self):
+        path = os.path.join(self.tmp.name, "render.sock")
+        self.serve(socket_path=path)
+        with socket.socket(socket.AF_UNIX) as client:
+            client.connect(path)
+            client.sendall(b"POST /render HTTP/1.1\r\nContent-Length: 6\r\n"
+                           b"Connection: close\r\n\r\n# Unix")
+            data = b""
+            while chunk := client.recv(4096):
+                data += chunk
+        self.assertTrue(data.startswith(b"HTTP/1.1 200"))
+        self.assertTrue(data.endswith(b"<h1>Unix</h1></div>"))
+
+    def test_percentile(self):
+        values = list(range(100))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import supporting
+from corpus import generate_markdown
+from fixtures import TempDirTestCase
+from supporting import extract_title_streaming, generate_page_streaming, render_page_refs
+from template import compile_template
+
+TEMPLATE = '<title>{{ Title }}</title><link href="/a.css">{{ Content }}</html>'
+
+
+class TestStreamingRender(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = f"{self.root}/template.html"
+        with open(self.template, "w") as f:
+            f.write(TEMPLATE)
+
+    def write_source(self, markdown):
+        path = f"{self.root}/page.md"
+        with open(path, "w") as f:
+            f.write(markdown)
+        return path
+
+    def read_output(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_matches_in_memory_render(self):
+        markdown = "\n\n".join(
+            generate_markdown(i, paragraphs=15, list_density=0.3,
+                              quote_density=0.3, code_density=0.3)
+            for i in range(5))
+        source = self.write_source(markdown)
+        dest = f"{self.root}/out/page.html"
+        _, refs = generate_page_streaming(source, self.template, dest, "/base/", True)
+        expected, expected_refs = render_page_refs(
+            markdown, compile_template(TEMPLATE, "/base/"), "/base/")
+        self.assertEqual(self.read_output(dest), expected)
+        self.assertEqual(refs, expected_refs)
+        self.assertFalse(os.path.exists(dest + ".tmp"))
+
+    def test_refs_only_when_asked_and_once_each(self):
+        source = self.write_source("# T\n\n[a](/x) [b](/x)\n\n![p](/i.png) [c](/y) [d](/x)")
+        dest = f"{self.root}/page.html"
+        self.assertIsNone(generate_page_streaming(source, self.template, dest, "/")[1])
+        _, refs = generate_page_streaming(source, self.template, dest, "/", True)
+        self.assertEqual(refs, (["/x", "/y"], ["/i.png"]))
+
+    def test_identical_output_left_alone(self):
+        source = self.write_source("# Same\n\nbody")
+        dest = f"{self.root}/page.html"
+        generate_page_streaming(source, self.template, dest, "/")
+        os.utime(dest, ns=(0, 0))
+        generate_page_streaming(source, self.template, dest, "/")
+        self.assertEqual(os.stat(dest).st_mtime_ns, 0)
+        self.assertEqual(sorted(os.listdir(self.root)), ["page.html", "page.md", "template.html"])
+
+    def test_title_found_late(self):
+        source = self.write_source("intro\n\nmore\n\n# Late title\n")
+        self.assertEqual(extract_title_streaming(source), "Late title")
+
+    def test_errors_leave_previous_output(self):
+        dest = f"{self.root}/page.html"
+        with open(dest, "w") as f:
+            f.write("old")
+        with self.assertRaises(Exception):
+            generate_page_streaming(
+                self.write_source("no title"), self.template, dest, "/")
+        self.assertEqual(self.read_output(dest), "old")
+        self.assertNotIn("page.html.tmp", os.listdir(self.root))
+
+    def test_generate_page_switches_to_streaming(self):
+        source = self.write_source("# Big\n\n" + "word " * 50)
+        original = supporting.STREAM_THRESHOLD
+        supporting.STREAM_THRESHOLD = 10
+        try:
+            with redirect_stdout(StringIO()):
+                supporting.generate_page(
+                    source, self.template, f"{self.root}/page.html", "/")
+        finally:
+            supporting.STREAM_THRESHOLD = original
+        self.assertIn("<h1>Big</h1>", self.read_output(f"{self.root}/page.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
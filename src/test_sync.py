@@ -0,0 +1,111 @@
+import os
+import unittest
+from unittest import mock
+
+from fixtures import TempDirTestCase, read, write
+from sync import fast_copy, is_unchanged, load_sync_state, place_file, remove_output, save_sync_state, sync_tree
+
+
+class TestSyncTree(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = f"{self.root}/static"
+        self.dest = f"{self.root}/docs"
+        write(f"{self.src}/index.css", "body {}")
+        write(f"{self.src}/images/a.png", "aaaa")
+        write(f"{self.dest}/index.html", "generated page")
+
+    def test_first_sync_copies_everything(self):
+        state, stats = sync_tree(self.src, self.dest)
+        self.assertEqual(stats["copied"], 2)
+        self.assertEqual(sorted(state), ["images/a.png", "index.css"])
+        self.assertEqual(read(f"{self.dest}/images/a.png"), "aaaa")
+
+    def test_second_sync_copies_nothing(self):
+        state, _ = sync_tree(self.src, self.dest)
+        _, stats = sync_tree(self.src, self.dest, state)
+        self.assertEqual(stats["copied"], 0)
+        self.assertEqual(stats["unchanged"], 2)
+
+    def test_changed_file_is_copied(self):
+        state, _ = sync_tree(self.src, self.dest)
+        write(f"{self.src}/index.css", "body { color: red }")
+        _, stats = sync_tree(self.src, self.dest, state)
+        self.assertEqual(stats["copied"], 1)
+        self.assertEqual(read(f"{self.dest}/index.css"), "body { color: red }")
+
+    def test_stale_files_deleted_but_not_other_outputs(self):
+        state, _ = sync_tree(self.src, self.dest)
+        os.remove(f"{self.src}/images/a.png")
+        _, stats = sync_tree(self.src, self.dest, state)
+        self.assertEqual(stats["deleted"], 1)
+        self.assertFalse(os.path.exists(f"{self.dest}/images"))
+        self.assertEqual(read(f"{self.dest}/index.html"), "generated page")
+
+    def test_remove_output_twice(self):
+        write(f"{self.dest}/blog/post/index.html", "post")
+        remove_output(self.dest, "blog/post/index.html")
+        self.assertFalse(os.path.exists(f"{self.dest}/blog"))
+        remove_output(self.dest, "blog/post/index.html")
+        self.assertTrue(os.path.exists(f"{self.dest}/index.html"))
+
+    def test_hash_mode_skips_identical_bytes_with_new_mtime(self):
+        state, _ = sync_tree(self.src, self.dest)
+        os.utime(f"{self.src}/index.css", ns=(0, 10**9))
+        _, stats = sync_tree(self.src, self.dest, state, use_hash=True)
+        self.assertEqual(stats["copied"], 0)
+        self.assertEqual(os.stat(f"{self.dest}/index.css").st_mtime_ns, 10**9)
+        _, stats = sync_tree(self.src, self.dest, state)
+        self.assertEqual(stats["unchanged"], 2)
+
+    def test_hash_mode_trusts_matching_mtime(self):
+        sync_tree(self.src, self.dest)
+        src = f"{self.src}/index.css"
+        with mock.patch("sync.hash_file") as hash_file:
+            self.assertTrue(is_unchanged(src, os.stat(src), f"{self.dest}/index.css", True))
+        hash_file.assert_not_called()
+
+    def test_hardlink_mode(self):
+        _, stats = sync_tree(self.src, self.dest, link="hardlink")
+        self.assertEqual(stats["linked"], 2)
+        self.assertTrue(os.path.samefile(
+            f"{self.src}/index.css", f"{self.dest}/index.css"))
+
+    def test_replacing_a_hardlink_leaves_source_alone(self):
+        sync_tree(self.src, self.dest, link="hardlink")
+        write(f"{self.root}/other.css", "other")
+        place_file(f"{self.root}/other.css", f"{self.dest}/index.css")
+        self.assertEqual(read(f"{self.src}/index.css"), "body {}")
+
+    def test_single_worker_matches_pool(self):
+        for i in range(50):
+            write(f"{self.src}/many/{i}.txt", str(i) * i)
+        _, serial = sync_tree(self.src, f"{self.root}/serial", workers=1)
+        _, pooled = sync_tree(self.src, f"{self.root}/pooled", workers=8)
+        self.assertEqual(serial, pooled)
+        self.assertEqual(read(f"{self.root}/pooled/many/49.txt"), "49" * 49)
+
+    def test_fast_copy_large_file_keeps_mtime(self):
+        data = os.urandom(3 << 20)
+        with open(f"{self.root}/big.bin", "wb") as f:
+            f.write(data)
+        os.utime(f"{self.root}/big.bin", ns=(0, 123 * 10**9))
+        fast_copy(f"{self.root}/big.bin", f"{self.root}/copy.bin")
+        with open(f"{self.root}/copy.bin", "rb") as f:
+            self.assertEqual(f.read(), data)
+        self.assertEqual(
+            os.stat(f"{self.root}/copy.bin").st_mtime_ns, 123 * 10**9)
+
+    def test_unknown_link_mode(self):
+        with self.assertRaises(ValueError):
+            sync_tree(self.src, self.dest, link="symlink")
+
+    def test_state_round_trip(self):
+        state, _ = sync_tree(self.src, self.dest)
+        save_sync_state(self.dest, state)
+        self.assertEqual(load_sync_state(self.dest), state)
+        self.assertEqual(load_sync_state(self.src), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
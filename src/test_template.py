@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+
+from template import compile_template, load_template, template_for
+from supporting import render_page
+
+
+class TestCompileTemplate(unittest.TestCase):
+    def test_segments_and_slots(self):
+        template = compile_template("<h1>{{ Title }}</h1>{{ Content }}!")
+        self.assertEqual(template.literals, ["<h1>", "</h1>", "!"])
+        self.assertEqual(
+            [name for name, _ in template.slots], ["Title", "Content"])
+
+    def test_render(self):
+        template = compile_template("<title>{{ Title }}</title>{{ Content }}")
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<p>x</p>"}),
+            "<title>Hi</title><p>x</p>",
+        )
+
+    def test_repeated_and_unknown_slots(self):
+        template = compile_template("{{ Title }}|{{ Title }}|{{ Footer }}")
+        self.assertEqual(template.render({"Title": "T"}), "T|T|{{ Footer }}")
+
+    def test_basepath_applied_to_template_only(self):
+        template = compile_template(
+            '<link href="/index.css"><img src="/a.png">{{ Content }}', "/base/")
+        self.assertEqual(
+            template.render({"Content": 'href="/untouched'}),
+            '<link href="/base/index.css"><img src="/base/a.png">href="/untouched',
+        )
+
+    def test_load_template_recompiles_on_change(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("a{{ Content }}")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+            with open(path, "w") as f:
+                f.write("bb{{ Content }}")
+            self.assertEqual(load_template(path).literals, ["bb", ""])
+
+    def test_partials_are_inlined_and_tracked(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            partial = os.path.join(tmp, "partials", "nav.html")
+            os.makedirs(os.path.dirname(partial))
+            with open(path, "w") as f:
+                f.write("{{> nav }}{{ Content }}")
+            with open(partial, "w") as f:
+                f.write('<a href="/">{{ Title }}</a>')
+            template = load_template(path, "/base/")
+            self.assertEqual(template.dependencies, [path, partial])
+            self.assertEqual(template.render({"Title": "T", "Content": "c"}),
+                             '<a href="/base/">T</a>c')
+            with open(partial, "w") as f:
+                f.write("nav v2 ")
+            self.assertEqual(load_template(path, "/base/").render({"Content": "c"}),
+                             "nav v2 c")
+
+    def test_recursive_and_missing_partials(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            os.makedirs(os.path.join(tmp, "partials"))
+            with open(os.path.join(tmp, "partials", "loop.html"), "w") as f:
+                f.write("{{> loop }}")
+            with open(path, "w") as f:
+                f.write("{{> loop }}")
+            with self.assertRaises(Exception):
+                load_template(path)
+            with open(path, "w") as f:
+                f.write("{{> nope }}")
+            with self.assertRaises(Exception):
+                load_template(path)
+
+    def test_template_for_section(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            blog = os.path.join(tmp, "template.blog.html")
+            for name in (path, blog):
+                with open(name, "w") as f:
+                    f.write("{{ Content }}")
+            self.assertEqual(template_for(path, ""), path)
+            self.assertEqual(template_for(path, "contact"), path)
+            self.assertEqual(template_for(path, "blog"), blog)
+            self.assertEqual(template_for(path, "blog/tom"), blog)
+
+
+class TestRenderPage(unittest.TestCase):
+    def test_links_rebased_but_code_untouched(self):
+        template = compile_template("{{ Content }}", "/base/")
+        html = render_page(
+            "# T\n\n[home](/) and `href=\"/x` ![i](/a.png)", template, "/base/")
+        self.assertEqual(
+            html,
+            '<div><h1>T</h1><p><a href="/base/">home</a> and '
+            '<code>href="/x</code> <img src="/base/a.png" alt="i"></img></p></div>',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import inotify
+from fixtures import TempDirTestCase, read, write
+from manifest import incremental_build, load_manifest
+from watch import SAVE_DELAY, SiteWatcher, diff, snapshot
+
+
+class TestSiteWatcher(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.root
+        self.content = f"{root}/content"
+        self.static = f"{root}/static"
+        self.docs = f"{root}/docs"
+        self.template = f"{root}/template.html"
+        write(self.template, "{{ Content }}")
+        write(f"{self.content}/index.md", "# Home")
+        write(f"{self.content}/blog/index.md", "# Blog")
+        write(f"{self.static}/index.css", "a {}")
+        self.watcher = SiteWatcher(
+            self.content, self.template, self.static, self.docs, "/")
+
+    def poll(self):
+        with redirect_stdout(StringIO()):
+            return self.watcher.poll()
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.poll(), [])
+
+    def test_markdown_edit_renders_only_that_page(self):
+        write(f"{self.content}/blog/index.md", "# Blog\n\nnew", bump=10**9)
+        self.assertEqual(self.poll(), ["blog/index.md"])
+        self.assertIn("<p>new</p>", read(f"{self.docs}/blog/index.html"))
+        self.assertFalse(os.path.exists(f"{self.docs}/index.html"))
+
+    def test_deleted_page_removes_output(self):
+        write(f"{self.content}/blog/index.md", "# Blog\n\nnew", bump=10**9)
+        self.poll()
+        os.remove(f"{self.content}/blog/index.md")
+        self.assertEqual(self.poll(), ["blog/index.md"])
+        self.assertFalse(os.path.exists(f"{self.docs}/blog"))
+
+    def test_deletions_are_recorded_for_later_resyncs(self):
+        write(f"{self.content}/blog/post/index.md", "# Post")
+        with redirect_stdout(StringIO()):
+            incremental_build(self.content, self.template, self.static, self.docs, "/")
+        self.poll()
+        os.remove(f"{self.content}/blog/post/index.md")
+        os.remove(f"{self.static}/index.css")
+        self.assertEqual(self.poll(), ["blog/post/index.md", "index.css"])
+        self.assertFalse(os.path.exists(f"{self.docs}/blog/post"))
+        self.watcher.save()
+        self.assertNotIn("blog/post/index.md", load_manifest(self.docs)["pages"])
+        write(self.template, "<main>{{ Content }}</main>", bump=10**9)
+        with redirect_stdout(StringIO()) as out:
+            self.watcher.timed(self.watcher.poll)
+        self.assertNotIn("failed", out.getvalue())
+        self.assertTrue(read(f"{self.docs}/blog/index.html").startswith("<main>"))
+
+    def test_new_page_is_recorded(self):
+        write(f"{self.content}/new/index.md", "# New\n\n[home](/)")
+        self.assertEqual(self.poll(), ["new/index.md"])
+        self.assertEqual(load_manifest(self.docs)["pages"], {})
+        self.watcher.save()
+        manifest = load_manifest(self.docs)
+        self.assertEqual(manifest["pages"]["new/index.md"]["output"], "new/index.html")
+        self.assertEqual(manifest["links"]["pages"]["new/index.html"]["links"], ["/"])
+
+    def test_static_edit_copies_only_that_asset(self):
+        write(f"{self.static}/images/a.png", "png")
+        self.assertEqual(self.poll(), ["images/a.png"])
+        self.assertEqual(read(f"{self.docs}/images/a.png"), "png")
+        self.assertFalse(os.path.exists(f"{self.docs}/index.css"))
+        self.assertIsNone(self.watcher.manifest)
+
+    def test_manifest_saved_when_idle(self):
+        write(f"{self.content}/index.md", "# Home\n\nnew", bump=10**9)
+        self.poll()
+        self.watcher.save_when_idle()
+        self.assertFalse(os.path.exists(f"{self.docs}/.manifest.json"))
+        self.watcher.edited_at -= SAVE_DELAY
+        self.watcher.save_when_idle()
+        self.assertIn("index.md", load_manifest(self.docs)["pages"])
+
+    def test_template_change_rebuilds_all(self):
+        write(self.template, "<main>{{ Content }}</main>", bump=10**9)
+        self.poll()
+        self.assertTrue(read(f"{self.docs}/index.html").startswith("<main>"))
+        self.assertTrue(read(f"{self.docs}/blog/index.html").startswith("<main>"))
+
+    def test_partial_change_rebuilds_dependents(self):
+        write(f"{self.root}/template.blog.html", "{{> nav }}{{ Content }}")
+        write(f"{self.root}/partials/nav.html", "nav1")
+        self.poll()
+        write(f"{self.root}/partials/nav.html", "nav2", bump=10**9)
+        self.assertEqual(self.poll(), [f"{self.root}/partials/nav.html"])
+        self.assertTrue(read(f"{self.docs}/blog/index.html").startswith("nav2"))
+        self.assertFalse(read(f"{self.docs}/index.html").startswith("nav"))
+
+
+@unittest.skipUnless(inotify.available(), "inotify is Linux only")
+class TestInotify(unittest.TestCase):
+    def test_events_drive_rebuild(self):
+        with tempfile.TemporaryDirectory() as root:
+            write(f"{root}/template.html", "{{ Content }}")
+            write(f"{root}/content/index.md", "# Home")
+            os.makedirs(f"{root}/static")
+            watcher = SiteWatcher(f"{root}/content", f"{root}/template.html",
+                                  f"{root}/static", f"{root}/docs", "/")
+            notifier = inotify.Inotify()
+            try:
+                notifier.add_tree(f"{root}/content")
+                notifier.add_tree(f"{root}/static")
+                write(f"{root}/content/index.md", "# Home\n\nedited")
+                write(f"{root}/content/new/index.md", "# New")
+                paths = []
+                for _ in range(5):
+                    paths.extend(watcher.events_to_paths(
+                        notifier, notifier.read(timeout=1)))
+                    if len(set(paths)) == 2:
+                        break
+            finally:
+                notifier.close()
+            with redirect_stdout(StringIO()):
+                rebuilt = watcher.apply(paths)
+            self.assertEqual(sorted(rebuilt), ["index.md", "new/index.md"])
+            self.assertIn("edited", read(f"{root}/docs/index.html"))
+
+
+class TestSnapshot(unittest.TestCase):
+    def test_diff(self):
+        old = {"a": (1, 1), "b": (1, 1)}
+        new = {"a": (2, 1), "c": (1, 1)}
+        self.assertEqual(diff(old, new), (["a", "c"], ["b"]))
+
+    def test_missing_root(self):
+        self.assertEqual(snapshot("/does/not/exist"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
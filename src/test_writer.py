@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from fixtures import TempDirTestCase, read, write
+from supporting import generate_page, generate_pages_batch, set_output_writer
+from writer import InlineWriter, OutputWriter, write_if_changed
+
+
+class TestWriteIfChanged(unittest.TestCase):
+    def test_identical_bytes_keep_mtime(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "a.html")
+            self.assertEqual(write_if_changed(path, b"one"), 3)
+            os.utime(path, ns=(0, 0))
+            self.assertIsNone(write_if_changed(path, b"one"))
+            self.assertEqual(os.stat(path).st_mtime_ns, 0)
+            self.assertEqual(write_if_changed(path, b"two"), 3)
+            self.assertEqual(read(path), "two")
+
+
+class TestOutputWriter(unittest.TestCase):
+    def test_writes_nested_outputs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with OutputWriter(workers=3, max_pending=2) as writer:
+                for i in range(20):
+                    writer.submit(f"{tmp}/d{i % 4}/sub/{i}.html", f"page {i}")
+            self.assertEqual(writer.written, 20)
+            self.assertEqual(read(f"{tmp}/d3/sub/7.html"), "page 7")
+            with OutputWriter() as writer:
+                writer.submit(f"{tmp}/d3/sub/7.html", "page 7")
+                writer.submit(f"{tmp}/d3/sub/11.html", "changed")
+            self.assertEqual((writer.written, writer.unchanged), (1, 1))
+            self.assertEqual(writer.bytes_written, len("changed"))
+
+    def test_errors_raised_on_flush(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write(f"{tmp}/file", "not a directory")
+            writer = OutputWriter()
+            writer.submit(f"{tmp}/file/page.html", "x")
+            with redirect_stdout(StringIO()):
+                with self.assertRaises(Exception):
+                    writer.close()
+
+    def test_generate_page_hands_off_to_writer(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write(f"{tmp}/template.html", "{{ Content }}")
+            write(f"{tmp}/index.md", "# Home")
+            writer = OutputWriter()
+            set_output_writer(writer)
+            try:
+                with redirect_stdout(StringIO()):
+                    generate_page(f"{tmp}/index.md", f"{tmp}/template.html",
+                                  f"{tmp}/docs/index.html", "/")
+            finally:
+                set_output_writer(None)
+                writer.close()
+            self.assertEqual(read(f"{tmp}/docs/index.html"),
+                             "<div><h1>Home</h1></div>")
+
+    def test_inline_writer_counts_rebuilds(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write(f"{tmp}/template.html", "{{ Content }}")
+            write(f"{tmp}/index.md", "# Home")
+            for expected in ((1, 0), (0, 1)):
+                writer = InlineWriter()
+                set_output_writer(writer)
+                try:
+                    with redirect_stdout(StringIO()):
+                        generate_page(f"{tmp}/index.md", f"{tmp}/template.html",
+                                      f"{tmp}/docs/index.html", "/")
+                finally:
+                    set_output_writer(None)
+                self.assertEqual((writer.written, writer.unchanged), expected)
+
+    def test_generate_page_without_writer_skips_identical(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write(f"{tmp}/template.html", "{{ Content }}")
+            write(f"{tmp}/index.md", "# Home")
+            dest = f"{tmp}/docs/index.html"
+            with redirect_stdout(StringIO()):
+                generate_page(f"{tmp}/index.md", f"{tmp}/template.html", dest, "/")
+                os.utime(dest, ns=(0, 0))
+                generate_page(f"{tmp}/index.md", f"{tmp}/template.html", dest, "/")
+            self.assertEqual(os.stat(dest).st_mtime_ns, 0)
+
+
+class TestBatchRender(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        write(f"{self.root}/template.html", '<a href="/">{{ Title }}</a>{{ Content }}')
+        self.pages = [
+            (f"# Tag {i}\n\n[post](/blog/p{i})", f"{self.root}/docs/tags/t{i % 3}/tag{i}.html")
+            for i in range(9)
+        ]
+
+    def batch(self, pages):
+        with redirect_stdout(StringIO()):
+            return generate_pages_batch(pages, f"{self.root}/template.html", "/base/")
+
+    def test_matches_generate_page(self):
+        self.assertEqual(self.batch(self.pages),
+                         {"pages": 9, "written": 9, "unchanged": 0})
+        write(f"{self.root}/tag4.md", self.pages[4][0])
+        with redirect_stdout(StringIO()):
+            generate_page(f"{self.root}/tag4.md", f"{self.root}/template.html",
+                          f"{self.root}/single.html", "/base/")
+        self.assertEqual(read(self.pages[4][1]), read(f"{self.root}/single.html"))
+        self.assertIn('<a href="/base/blog/p4">', read(self.pages[4][1]))
+
+    def test_rerun_leaves_outputs_alone(self):
+        self.batch(self.pages)
+        os.utime(self.pages[0][1], ns=(0, 0))
+        self.assertEqual(self.batch(self.pages)["unchanged"], 9)
+        self.assertEqual(os.stat(self.pages[0][1]).st_mtime_ns, 0)
+
+    def test_errors_do_not_stop_the_batch(self):
+        with self.assertRaises(Exception):
+            self.batch([("no title", f"{self.root}/docs/bad.html")] + self.pages)
+        self.assertFalse(os.path.exists(f"{self.root}/docs/bad.html"))
+        self.assertTrue(os.path.exists(self.pages[-1][1]))
+
+    def test_write_if_changed_relative_to_directory(self):
+        fd = os.open(self.root, os.O_RDONLY)
+        try:
+            self.assertEqual(write_if_changed("rel.html", b"x", fd), 1)
+            self.assertIsNone(write_if_changed("rel.html", b"x", fd))
+        finally:
+            os.close(fd)
+        self.assertEqual(read(f"{self.root}/rel.html"), "x")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,262 @@
+import argparse
+import functools
+import os
+import threading
+import time
+import inotify
+from discovery import scan_files
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from linkgraph import LinkIndex
+from manifest import (
+    incremental_build, load_manifest, load_page_state, save_manifest,
+    save_page_state, update_pages)
+from sync import load_sync_state, place_file, remove_output, save_sync_state
+from template import PARTIALS_DIR
+
+# seconds without edits before the in-memory manifest is written back
+SAVE_DELAY = 1.0
+
+
+def snapshot(root):
+    return {
+        rel_path: (stat.st_mtime_ns, stat.st_size)
+        for rel_path, stat in scan_files(root).items()
+    }
+
+
+def diff(old, new):
+    changed = [path for path, state in new.items() if old.get(path) != state]
+    removed = [path for path in old if path not in new]
+    return sorted(changed), sorted(removed)
+
+
+class SiteWatcher():
+    def __init__(self, content_path, template_path, static_path, dest_path, basepath):
+        self.content_path = content_path
+        self.template_path = template_path
+        self.static_path = static_path
+        self.dest_path = dest_path
+        self.basepath = basepath
+        self.content = snapshot(content_path)
+        self.template_dir = os.path.dirname(template_path)
+        self.partials_path = os.path.join(self.template_dir, PARTIALS_DIR)
+        self.template = self.template_snapshot()
+        self.static = snapshot(static_path)
+        # the manifest, its link index and the page outputs stay in memory
+        # between edits and are saved once the edits stop, or on exit
+        self.manifest = None
+        self.index = None
+        self.page_outputs = None
+        self.edited_at = None
+
+    def relative(self, root, path):
+        rel_path = os.path.relpath(path, root)
+        if rel_path == "." or rel_path.startswith(".."):
+            return None
+        return rel_path.replace(os.sep, "/")
+
+    def is_template(self, path):
+        # the site template, a section template next to it or a partial
+        if self.relative(self.partials_path, path) is not None:
+            return True
+        if os.path.abspath(os.path.dirname(path)) != os.path.abspath(self.template_dir):
+            return False
+        root, ext = os.path.splitext(os.path.basename(self.template_path))
+        name = os.path.basename(path)
+        return name == root + ext or (name.startswith(root + ".") and name.endswith(ext))
+
+    def template_snapshot(self):
+        found = {}
+        for path in os.listdir(self.template_dir or "."):
+            path = os.path.join(self.template_dir, path)
+            if self.is_template(path) and os.path.isfile(path):
+                stat = os.stat(path)
+                found[path] = (stat.st_mtime_ns, stat.st_size)
+        for rel_path, state in snapshot(self.partials_path).items():
+            found[os.path.join(self.partials_path, rel_path)] = state
+        return found
+
+    def apply(self, paths):
+        templates = sorted({path for path in paths if self.is_template(path)})
+        if templates:
+            # the manifest knows which pages used which templates and
+            # partials, so only those are re-rendered
+            self.resync()
+            return templates
+        pages = []
+        assets = []
+        for path in sorted(set(paths)):
+            if os.path.isdir(path):
+                continue
+            rel_path = self.relative(self.content_path, path)
+            if rel_path is not None:
+                pages.append(rel_path)
+                continue
+            rel_path = self.relative(self.static_path, path)
+            if rel_path is not None:
+                assets.append(rel_path)
+        if assets:
+            self.sync_assets(assets)
+        if pages:
+            # also records what changed, so the next incremental build or
+            # template resync starts from what is really on disk
+            self.load()
+            update_pages(self.content_path, self.template_path, self.dest_path,
+                         self.basepath, pages, self.manifest, self.index,
+                         self.page_outputs)
+            self.edited_at = time.monotonic()
+        return sorted(pages + assets)
+
+    def load(self):
+        if self.manifest is None:
+            self.manifest = load_manifest(self.dest_path)
+            self.index = LinkIndex.from_dict(self.manifest["links"])
+            self.page_outputs = set(load_page_state(self.dest_path))
+
+    def save(self):
+        if self.edited_at is not None:
+            save_manifest(self.dest_path, self.manifest)
+            save_page_state(self.dest_path, self.page_outputs)
+            self.edited_at = None
+
+    def save_when_idle(self):
+        if self.edited_at is not None and time.monotonic() - self.edited_at >= SAVE_DELAY:
+            self.save()
+
+    def sync_assets(self, rel_paths):
+        state = load_sync_state(self.dest_path)
+        for rel_path in rel_paths:
+            path = os.path.join(self.static_path, rel_path)
+            target = os.path.join(self.dest_path, rel_path)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                place_file(path, target)
+                state[rel_path] = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+            else:
+                remove_output(self.dest_path, rel_path)
+                state.pop(rel_path, None)
+        save_sync_state(self.dest_path, state)
+
+    def poll(self):
+        paths = []
+        template = self.template_snapshot()
+        changed, removed = diff(self.template, template)
+        self.template = template
+        paths.extend(changed + removed)
+        for root, attribute in ((self.content_path, "content"),
+                                (self.static_path, "static")):
+            current = snapshot(root)
+            changed, removed = diff(getattr(self, attribute), current)
+            setattr(self, attribute, current)
+            paths.extend(os.path.join(root, rel_path) for rel_path in changed + removed)
+        return self.apply(paths)
+
+    def resync(self):
+        # the build reads the manifest from disk and writes its own back
+        self.save()
+        self.manifest = None
+        incremental_build(self.content_path, self.template_path,
+                          self.static_path, self.dest_path, self.basepath)
+
+    def events_to_paths(self, notifier, events):
+        paths = []
+        for path, mask in events:
+            if mask & inotify.IN_ISDIR:
+                watched = (self.relative(self.content_path, path) is not None
+                           or self.relative(self.static_path, path) is not None)
+                if not watched:
+                    continue
+                if mask & (inotify.IN_CREATE | inotify.IN_MOVED_TO):
+                    notifier.add_tree(path)
+                    for dir_path, _, file_names in os.walk(path):
+                        paths.extend(os.path.join(dir_path, name) for name in file_names)
+                elif mask & inotify.IN_MOVED_FROM:
+                    # a whole directory vanished; let the manifest sort it out
+                    return None
+                continue
+            # a new file is picked up by its IN_CLOSE_WRITE
+            if mask & (inotify.IN_CREATE | inotify.IN_DELETE_SELF):
+                continue
+            paths.append(path)
+        return paths
+
+    def run(self, interval):
+        try:
+            if inotify.available():
+                self.run_inotify()
+            else:
+                self.run_polling(interval)
+        finally:
+            self.save()
+
+    def run_polling(self, interval):
+        while True:
+            self.timed(self.poll)
+            self.save_when_idle()
+            time.sleep(interval)
+
+    def run_inotify(self):
+        notifier = inotify.Inotify()
+        try:
+            notifier.add_tree(self.content_path)
+            notifier.add_tree(self.static_path)
+            notifier.add_directory(self.template_dir or ".")
+            if os.path.isdir(self.partials_path):
+                notifier.add_tree(self.partials_path)
+            while True:
+                events = notifier.read(None if self.edited_at is None else SAVE_DELAY)
+                paths = self.events_to_paths(notifier, events)
+                if paths is None:
+                    self.timed(self.resync)
+                elif paths:
+                    self.timed(self.apply, paths)
+                self.save_when_idle()
+        finally:
+            notifier.close()
+
+    def timed(self, rebuild, *args):
+        start = time.perf_counter()
+        try:
+            rebuilt = rebuild(*args)
+        except Exception as e:
+            # a half-written file should not take the dev server down
+            print(f"rebuild failed: {e}")
+            return
+        if rebuilt is None or rebuilt:
+            print(f"rebuilt {len(rebuilt) if rebuilt else "site"} in "
+                  f"{(time.perf_counter() - start) * 1e3:.1f}ms")
+
+
+def serve(dest_path, port):
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=dest_path)
+    server = ThreadingHTTPServer(("", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="serve docs/ and rebuild whatever changes")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--interval", type=float, default=0.05,
+                        help="seconds between polls of the source trees")
+    args = parser.parse_args()
+
+    incremental_build("content", "template.html", "static", "docs", args.basepath)
+    watcher = SiteWatcher(
+        "content", "template.html", "static", "docs", args.basepath)
+    server = serve("docs", args.port)
+    print(f"serving docs on http://localhost:{args.port}/, watching for changes")
+    try:
+        watcher.run(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import os
+import queue
+import threading
+
+DEFAULT_WRITERS = 2
+MAX_PENDING = 64
+
+
+def as_bytes(text):
+    return text if isinstance(text, bytes) else text.encode()
+
+
+def _opener(dir_fd):
+    if dir_fd is None:
+        return None
+    return lambda path, flags: os.open(path, flags, dir_fd=dir_fd)
+
+
+def write_if_changed(path, data, dir_fd=None):
+    # leaves the file and its mtime alone when it already holds these bytes,
+    # so rsync and CDN uploads only see pages that really changed; with
+    # dir_fd, path is relative to that open directory. Returns the number of
+    # bytes written, or None when the file was left alone
+    opener = _opener(dir_fd)
+    try:
+        if os.stat(path, dir_fd=dir_fd).st_size == len(data):
+            with open(path, "rb", opener=opener) as f:
+                if f.read() == data:
+                    return None
+    except FileNotFoundError:
+        pass
+    with open(path, "wb", opener=opener) as f:
+        f.write(data)
+    return len(data)
+
+
+class InlineWriter():
+    # the same interface as OutputWriter, but writes on the caller's thread
+    def __init__(self):
+        self.created_dirs = set()
+        self.written = 0
+        self.bytes_written = 0
+        self.unchanged = 0
+
+    def submit(self, path, text):
+        directory = os.path.dirname(path)
+        if directory not in self.created_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self.created_dirs.add(directory)
+        self.count(write_if_changed(path, as_bytes(text)))
+
+    def count(self, written):
+        # written is what write_if_changed returned
+        if written is None:
+            self.unchanged += 1
+        else:
+            self.written += 1
+            self.bytes_written += written
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class OutputWriter():
+    def __init__(self, workers=DEFAULT_WRITERS, max_pending=MAX_PENDING):
+        # a bounded queue keeps rendering at most max_pending pages ahead
+        # of the disk, so memory stays flat on large sites
+        self.queue = queue.Queue(max_pending)
+        self.lock = threading.Lock()
+        self.created_dirs = set()
+        self.written = 0
+        self.bytes_written = 0
+        self.unchanged = 0
+        self.errors = []
+        self.threads = [
+            threading.Thread(target=self._run, daemon=True)
+            for _ in range(max(1, workers))
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, path, text):
+        self.queue.put((path, as_bytes(text)))
+
+    def _ensure_dir(self, directory):
+        with self.lock:
+            if directory in self.created_dirs:
+                return
+        os.makedirs(directory, exist_ok=True)
+        with self.lock:
+            self.created_dirs.add(directory)
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                self.queue.task_done()
+                return
+            path, data = job
+            try:
+                self._ensure_dir(os.path.dirname(path))
+                self.count(write_if_changed(path, data))
+            except Exception as e:
+                with self.lock:
+                    self.errors.append((path, e))
+            finally:
+                self.queue.task_done()
+
+    def count(self, written):
+        with self.lock:
+            if written is None:
+                self.unchanged += 1
+            else:
+                self.written += 1
+                self.bytes_written += written
+
+    def flush(self):
+        self.queue.join()
+        if self.errors:
+            errors, self.errors = self.errors, []
+            for path, error in errors:
+                print(f"error writing {path}: {error}")
+            raise Exception(f"failed to write {len(errors)} outputs")
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            for _ in self.threads:
+                self.queue.put(None)
+            for thread in self.threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()